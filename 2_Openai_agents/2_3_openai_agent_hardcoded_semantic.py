@@ -5,7 +5,8 @@ from dotenv import load_dotenv
 import asyncio
 from agents import Agent, Runner, function_tool
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
+from chroma_sync import sync_collection
 
 load_dotenv(override=True)
 
@@ -18,9 +19,10 @@ chroma_client = chromadb.PersistentClient(
     path=r"c:/code/agenticai/2_openai_agents/rag/chromadb"
 )
 
-# HuggingFace embeddings
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
+# HuggingFace embeddings (vectors cached on disk, only new texts are encoded)
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/2_openai_agents/rag/embedding_cache.sqlite3"
 )
 
 # Create / load collection
@@ -40,10 +42,8 @@ knowledge_base = {
     "customer_support": "You can reach our support team 24/7 via email or chat."
 }
 
-collection.add(
-    documents=list(knowledge_base.values()),
-    ids=list(knowledge_base.keys())
-)
+# Only new or changed documents are embedded; removed ones are deleted
+sync_collection(collection, knowledge_base)
 
 # ----------------------------------------------------
 # 3. Tool used by Agent to query ChromaDB (RAG)
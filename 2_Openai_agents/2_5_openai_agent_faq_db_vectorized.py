@@ -9,7 +9,7 @@ from sentence_transformers import SentenceTransformer
 from agents import Agent, Runner, function_tool
 
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
 
 
 # ----------------------------------------------------
@@ -40,9 +40,10 @@ chroma_client = chromadb.PersistentClient(
     path=r"c:/code/agenticai/2_openai_agents/rag/chromadb"
 )
 
-# HuggingFace embedding model
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
+# HuggingFace embedding model (vectors cached on disk, only new texts are encoded)
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/2_openai_agents/rag/embedding_cache.sqlite3"
 )
 
 # Create collection
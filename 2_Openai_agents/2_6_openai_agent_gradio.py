@@ -5,7 +5,8 @@ import asyncio
 import gradio as gr
 from agents import Agent, Runner, function_tool
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
+from chroma_sync import sync_collection
 
 # --- Setup ---
 load_dotenv(override=True)
@@ -15,8 +16,9 @@ chroma_client = chromadb.PersistentClient(
     path=r"c:/code/agenticai/2_openai_agents/rag/chromadb"
 )
 
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/2_openai_agents/rag/embedding_cache.sqlite3"
 )
 
 collection = chroma_client.get_or_create_collection(
@@ -33,16 +35,9 @@ knowledge_base = {
     "customer_support": "You can reach our support team 24/7 via email or chat."
 }
 
-# Clear old docs and add new ones
-existing = collection.get()
-if existing["ids"]:
-    collection.delete(ids=existing["ids"])
-
-collection.add(
-    documents=list(knowledge_base.values()),
-    ids=list(knowledge_base.keys()),
-)
-print("ChromaDB populated with FAQ documents and embeddings")
+# Embed only new or changed docs and drop removed ones
+stats = sync_collection(collection, knowledge_base)
+print(f"ChromaDB synced with FAQ documents: {stats}")
 
 # --- FAQ Tool using Chroma semantic search ---
 @function_tool
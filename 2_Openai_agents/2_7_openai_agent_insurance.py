@@ -8,7 +8,7 @@ from openai import OpenAI
 from agents import Agent, Runner, function_tool
 import asyncio
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
 
 # --- Load environment ---
 load_dotenv(override=True)
@@ -30,14 +30,15 @@ chroma_client = chromadb.PersistentClient(
     path=r"c:/code/agenticai/2_openai_agents/rag/chroma_pdf"
 )
 
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/2_openai_agents/rag/embedding_cache.sqlite3"
 )
 
 collection_name = "pdf_collection"
 existing_collections = [c.name for c in chroma_client.list_collections()]
 if collection_name in existing_collections:
-    collection = chroma_client.get_collection(name=collection_name)
+    collection = chroma_client.get_collection(name=collection_name, embedding_function=embedding_fn)
     print(f"Loaded existing collection '{collection_name}'")
 else:
     collection = chroma_client.create_collection(
@@ -0,0 +1,108 @@
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+SQLITE_MAX_PARAMS = 500  # Keys per SELECT ... IN (...)
+
+
+class CachedSentenceTransformerEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """
+    Drop-in replacement for SentenceTransformerEmbeddingFunction that keeps
+    every vector it computes in a SQLite file, keyed by (model, text hash)
+    and stored as float32 blobs.
+
+    Only texts missing from the cache are encoded, in a single batch, and
+    the model itself is not loaded until the first miss. Chroma sees the
+    same name and config as the wrapped function, so existing collections
+    open without an embedding function conflict.
+    """
+
+    def __init__(self, model_name="all-MiniLM-L6-v2", path="embedding_cache.sqlite3",
+                 device="cpu", normalize_embeddings=False, **kwargs):
+        self.model_name = model_name
+        self.device = device
+        self.normalize_embeddings = normalize_embeddings
+        self.kwargs = kwargs
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, text):
+        model = f"{self.model_name}|normalize={self.normalize_embeddings}"
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def _model_instance(self):
+        # Shares the loaded model with plain SentenceTransformerEmbeddingFunction instances
+        if self.model_name not in self.models:
+            from sentence_transformers import SentenceTransformer
+            self.models[self.model_name] = SentenceTransformer(
+                model_name_or_path=self.model_name, device=self.device, **self.kwargs
+            )
+        return self.models[self.model_name]
+
+    def _lookup(self, keys):
+        conn = self._connect()
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), SQLITE_MAX_PARAMS):
+            chunk = unique[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def __call__(self, input):
+        texts = list(input)
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+
+        # Encode each distinct missing text once, all in one batch
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            first_text = {}
+            for key, text in zip(keys, texts):
+                first_text.setdefault(key, text)
+            vectors = self._model_instance().encode(
+                [first_text[key] for key in missing],
+                convert_to_numpy=True,
+                normalize_embeddings=self.normalize_embeddings,
+            ).astype(np.float32)
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    [(key, self.model_name, vector.tobytes()) for key, vector in zip(missing, vectors)],
+                )
+            found.update(zip(missing, vectors))
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [found[key] for key in keys]
+
+    def stats(self):
+        entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
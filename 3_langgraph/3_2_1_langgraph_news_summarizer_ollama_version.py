@@ -3,9 +3,10 @@
 from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-import os, requests
+import os
 from langgraph.graph import StateGraph, END
 from typing import TypedDict
+from news_client import NewsClient
 
 # --------------------------
 # Shared State
@@ -30,16 +31,15 @@ llm = ChatOllama(
 )
 
 news_key = os.getenv("NEWS_API_KEY")
+news_client = NewsClient(news_key)
 
 # --------------------------
 # Agent Functions
 # --------------------------
 def fetch_news(state: AgentState) -> AgentState:
     print("Agent 1: Fetching news...")
-    url = f"https://newsapi.org/v2/everything?q={state['topic']}&apiKey={news_key}&pageSize=5"
     try:
-        r = requests.get(url)
-        articles = [a["title"] for a in r.json().get("articles", [])]
+        articles = news_client.get_headlines(state["topic"])
         headlines = "\n".join(articles)
         print(f"Headlines: {headlines}") # For debugging
     except Exception as e:
@@ -8,6 +8,7 @@ import pandas as pd
 import gradio as gr
 import chromadb
 from chromadb.config import Settings
+from hybrid_retriever import HybridRetriever
 
 # --- Step 1: Define state ---
 class ChatState(TypedDict):
@@ -56,24 +57,34 @@ else:
     )
     vectordb.persist()
 
+# Keyword (BM25) index over the stored queries, fused with vector search,
+# so short queries like "KYC" or "IFSC" still find the right FAQ
+retriever = HybridRetriever(vectordb._collection, embed_query=embeddings.embed_query)
+
 # --- Step 5: LangGraph node ---
 def retrieve_answer(state: ChatState) -> ChatState:
-    results = vectordb.similarity_search_with_score(
-        state["query"], k=1
+    results = retriever.query(
+        query_texts=[state["query"]], n_results=1
     )
 
-    if not results:
+    if not results["ids"][0]:
         state["answer"] = "Sorry, I could not find an answer."
         return state
 
-    doc, distance = results[0]
-    similarity = 1 - distance
+    metadata = results["metadatas"][0][0]
+    distance = results["distances"][0][0]
+
+    response = metadata["Response"]
 
-    response = doc.metadata["Response"]
+    # Keyword-only matches have no vector distance
+    if distance is None:
+        confidence = "keyword match"
+    else:
+        confidence = f"{1 - distance:.2f}"
 
     state["answer"] = (
         f"{response}\n\n"
-        f"(Confidence: {similarity:.2f})"
+        f"(Confidence: {confidence})"
     )
     return state
 
@@ -91,7 +102,7 @@ def chat_fn(message, history):
 # --- Step 8: Gradio UI ---
 demo = gr.ChatInterface(
     fn=chat_fn,
-    title="Banking FAQ Chatbot (Vector Search)",
+    title="Banking FAQ Chatbot (Hybrid Search)",
     examples=[
         "How can I open a new bank account?",
         "What documents are required to open an account?",
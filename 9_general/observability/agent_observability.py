@@ -1,10 +1,11 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-import os, requests, logging, time
+import os, logging, time
 
 from langgraph.graph import StateGraph, END
 from typing import TypedDict
+from news_client import NewsClient
 from langsmith import traceable
 
 # --------------------------
@@ -33,6 +34,7 @@ class AgentState(TypedDict):
 load_dotenv(override=True)
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
 news_key = os.getenv("NEWS_API_KEY")
+news_client = NewsClient(news_key)
 
 # --------------------------
 # Agent Functions (with observability)
@@ -41,12 +43,10 @@ news_key = os.getenv("NEWS_API_KEY")
 @traceable(name="fetch_news")
 def fetch_news(state: AgentState) -> AgentState:
     logger.info(f"[fetch_news] topic={state['topic']}")
-    url = f"https://newsapi.org/v2/everything?q={state['topic']}&apiKey={news_key}&pageSize=5"
 
     t0 = time.time()
     try:
-        r = requests.get(url)
-        articles = [a["title"] for a in r.json().get("articles", [])]
+        articles = news_client.get_headlines(state["topic"])
         headlines = "\n".join(articles)
         logger.info(f"[fetch_news] articles_found={len(articles)}")
     except Exception as e:
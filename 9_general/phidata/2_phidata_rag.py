@@ -8,7 +8,7 @@
 
 # --------- IMPORTS ----------
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
 
 from phi.agent import Agent
 from phi.model.openai import OpenAIChat
@@ -26,8 +26,9 @@ documents = [
 ]
 
 # --------- STEP 2: CREATE CHROMADB ----------
-embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
+embedding_function = CachedSentenceTransformerEmbeddingFunction(
+    model_name="all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/9_general/phidata/embedding_cache.sqlite3"
 )
 
 client = chromadb.Client()
@@ -1,9 +1,12 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from dotenv import load_dotenv
-import os, requests
+import os, threading
 from langgraph.graph import StateGraph, END
 from typing import TypedDict
+from news_client import NewsClient, NewsFetchError
+from node_memo import NodeMemo
 
 # --------------------------
 # Shared State
@@ -16,31 +19,74 @@ class AgentState(TypedDict):
     final_report: str
     sentiment_label: str
 
+# Extra keys used when both reports are generated speculatively
+class SpeculativeState(AgentState):
+    investor_report: str
+    public_report: str
+    investor_tokens: int
+    public_tokens: int
+    report_kind: str
+
 # --------------------------
 # Setup
 # --------------------------
 load_dotenv(override=True)
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+# Optional per-provider request rates (requests/second), shared by every run in this process
+def rate_limiter(env_var):
+    rps = os.getenv(env_var)
+    if not rps:
+        return None
+    rps = float(rps)
+    # Poll faster than the default 100ms so rates above 10 rps are reachable
+    return InMemoryRateLimiter(requests_per_second=rps, check_every_n_seconds=min(0.1, 0.5 / rps),
+                               max_bucket_size=max(1.0, rps))
+
+LLM_MODEL = "gpt-4o-mini"
+llm = ChatOpenAI(model=LLM_MODEL, temperature=0.3, rate_limiter=rate_limiter("OPENAI_RPS"))
 news_key = os.getenv("NEWS_API_KEY")
+news_client = NewsClient(news_key, rate_limiter=rate_limiter("NEWSAPI_RPS"))
+
+# Run investor_summary and public_summary alongside analyze_sentiment
+SPECULATIVE_REPORTS = os.getenv("SPECULATIVE_REPORTS", "false").lower() == "true"
+
+# Reuse node outputs when their inputs (headlines, summary) have not changed
+NODE_MEMO_ENABLED = os.getenv("NODE_MEMO_ENABLED", "true").lower() == "true"
+node_memo = NodeMemo(
+    os.getenv("NODE_MEMO_PATH", "node_memo.sqlite3"),
+    ttl=int(os.getenv("NODE_MEMO_TTL", str(6 * 60 * 60))),
+    namespace=LLM_MODEL,
+)
+
+def memoize(node, input_keys, **kwargs):
+    if not NODE_MEMO_ENABLED:
+        return lambda fn: fn
+    return node_memo.memoize(node, input_keys, **kwargs)
+
+def has_headlines(inputs):
+    # Never memoize a summary of a failed fetch
+    return not inputs["headlines"].startswith("Error fetching news")
 
 # --------------------------
 # Agent Functions
 # --------------------------
 def fetch_news(state: AgentState) -> AgentState:
-    url = f"https://newsapi.org/v2/everything?q={state['topic']}&apiKey={news_key}&pageSize=5"
     try:
-        r = requests.get(url)
-        articles = [a["title"] for a in r.json().get("articles", [])]
+        articles = news_client.get_headlines(state["topic"])
         headlines = "\n".join(articles)
-    except Exception as e:
+    except NewsFetchError as e:
         headlines = f"Error fetching news: {e}"
+    except Exception:
+        # Raw exception text can carry request details; it is streamed to clients
+        headlines = "Error fetching news: unexpected error"
     return {"headlines": headlines}
 
+@memoize("summarize_news", ["topic", "headlines"], cacheable=has_headlines)
 def summarize_news(state: AgentState) -> AgentState:
     prompt = f"Summarize these headlines about {state['topic']}:\n{state['headlines']}"
     resp = llm.invoke([HumanMessage(content=prompt)])
     return {"summary": resp.content}
 
+@memoize("analyze_sentiment", ["summary"])
 def analyze_sentiment(state: AgentState) -> AgentState:
     prompt = f"Is this summary overall positive or negative?\n\n{state['summary']}"
     resp = llm.invoke([HumanMessage(content=prompt)])
@@ -48,43 +94,123 @@ def analyze_sentiment(state: AgentState) -> AgentState:
     label = "positive" if "positive" in sentiment else "negative"
     return {"sentiment": sentiment, "sentiment_label": label}
 
+def investor_report(summary: str):
+    prompt = f"Write an investor-focused insight based on:\n{summary}"
+    return llm.invoke([HumanMessage(content=prompt)])
+
+def public_report(summary: str):
+    prompt = f"Write a short public news digest based on:\n{summary}"
+    return llm.invoke([HumanMessage(content=prompt)])
+
+@memoize("investor_summary", ["summary"])
 def investor_summary(state: AgentState) -> AgentState:
-    prompt = f"Write an investor-focused insight based on:\n{state['summary']}"
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return {"final_report": resp.content}
+    return {"final_report": investor_report(state["summary"]).content}
 
+@memoize("public_summary", ["summary"])
 def public_summary(state: AgentState) -> AgentState:
-    prompt = f"Write a short public news digest based on:\n{state['summary']}"
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return {"final_report": resp.content}
+    return {"final_report": public_report(state["summary"]).content}
+
+def route_report(state: AgentState) -> str:
+    return "investor_summary" if state["sentiment_label"] == "positive" else "public_summary"
+
+# --------------------------
+# Speculative report nodes
+# --------------------------
+# Cost of the discarded branch, exposed by the Flask app
+speculation_stats = {"runs": 0, "wasted_calls": 0, "wasted_tokens": 0}
+_speculation_lock = threading.Lock()
+
+def total_tokens(resp) -> int:
+    usage = getattr(resp, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+# Tokens of None mark a memo hit: that branch cost nothing, so it is not waste
+@memoize("speculative_investor_summary", ["summary"], on_hit={"investor_tokens": None})
+def speculative_investor_summary(state: SpeculativeState) -> SpeculativeState:
+    resp = investor_report(state["summary"])
+    return {"investor_report": resp.content, "investor_tokens": total_tokens(resp)}
+
+@memoize("speculative_public_summary", ["summary"], on_hit={"public_tokens": None})
+def speculative_public_summary(state: SpeculativeState) -> SpeculativeState:
+    resp = public_report(state["summary"])
+    return {"public_report": resp.content, "public_tokens": total_tokens(resp)}
+
+def select_report(state: SpeculativeState) -> SpeculativeState:
+    # Keep the branch the sentiment picks and discard the other one
+    keep, discard = ("investor", "public") if state["sentiment_label"] == "positive" else ("public", "investor")
+    wasted_tokens = state.get(f"{discard}_tokens")
+    with _speculation_lock:
+        speculation_stats["runs"] += 1
+        if wasted_tokens is not None:
+            speculation_stats["wasted_calls"] += 1
+            speculation_stats["wasted_tokens"] += wasted_tokens
+    return {"final_report": state[f"{keep}_report"], "report_kind": keep}
 
 # --------------------------
 # Build Graph
 # --------------------------
-workflow = StateGraph(AgentState)
-workflow.add_node("fetch_news", fetch_news)
-workflow.add_node("summarize_news", summarize_news)
-workflow.add_node("analyze_sentiment", analyze_sentiment)
-workflow.add_node("investor_summary", investor_summary)
-workflow.add_node("public_summary", public_summary)
-
-workflow.set_entry_point("fetch_news")
-workflow.add_edge("fetch_news", "summarize_news")
-workflow.add_edge("summarize_news", "analyze_sentiment")
-workflow.add_conditional_edges(
-    "analyze_sentiment",
-    lambda state: "investor_summary" if state["sentiment_label"] == "positive" else "public_summary"
-)
-workflow.add_edge("investor_summary", END)
-workflow.add_edge("public_summary", END)
+def build_graph(speculative: bool = False):
+    if speculative:
+        workflow = StateGraph(SpeculativeState)
+        workflow.add_node("fetch_news", fetch_news)
+        workflow.add_node("summarize_news", summarize_news)
+        workflow.add_node("analyze_sentiment", analyze_sentiment)
+        workflow.add_node("speculative_investor_summary", speculative_investor_summary)
+        workflow.add_node("speculative_public_summary", speculative_public_summary)
+        workflow.add_node("select_report", select_report)
+
+        workflow.set_entry_point("fetch_news")
+        workflow.add_edge("fetch_news", "summarize_news")
+        # Both reports only need the summary, so they run next to the sentiment call
+        workflow.add_edge("summarize_news", "analyze_sentiment")
+        workflow.add_edge("summarize_news", "speculative_investor_summary")
+        workflow.add_edge("summarize_news", "speculative_public_summary")
+        workflow.add_edge(
+            ["analyze_sentiment", "speculative_investor_summary", "speculative_public_summary"],
+            "select_report"
+        )
+        workflow.add_edge("select_report", END)
+        return workflow.compile()
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("fetch_news", fetch_news)
+    workflow.add_node("summarize_news", summarize_news)
+    workflow.add_node("analyze_sentiment", analyze_sentiment)
+    workflow.add_node("investor_summary", investor_summary)
+    workflow.add_node("public_summary", public_summary)
 
-app = workflow.compile()
+    workflow.set_entry_point("fetch_news")
+    workflow.add_edge("fetch_news", "summarize_news")
+    workflow.add_edge("summarize_news", "analyze_sentiment")
+    workflow.add_conditional_edges("analyze_sentiment", route_report)
+    workflow.add_edge("investor_summary", END)
+    workflow.add_edge("public_summary", END)
+    return workflow.compile()
+
+app = build_graph(speculative=SPECULATIVE_REPORTS)
 
 # --------------------------
 # Streaming function
 # --------------------------
-def run_agent_for_topic(topic: str):
-    initial = {
+# Render one node's state update as a chunk of the report
+def format_update(node: str, update: dict) -> str:
+    if node == "fetch_news":
+        return f"Headlines:\n{update['headlines']}\n\n"
+    if node == "summarize_news":
+        return f"Summary:\n{update['summary']}\n\n"
+    if node == "analyze_sentiment":
+        return f"Sentiment: {update['sentiment']} ({update['sentiment_label']})\n\n"
+    if node == "investor_summary":
+        return f"Investor Summary:\n{update['final_report']}\n"
+    if node == "public_summary":
+        return f"Public Summary:\n{update['final_report']}\n"
+    if node == "select_report":
+        title = "Investor Summary" if update["report_kind"] == "investor" else "Public Summary"
+        return f"{title}:\n{update['final_report']}\n"
+    return ""
+
+def initial_state(topic: str) -> AgentState:
+    return {
         "topic": topic,
         "headlines": "",
         "summary": "",
@@ -93,26 +219,36 @@ def run_agent_for_topic(topic: str):
         "sentiment_label": ""
     }
 
-    # 1. Fetch news
-    result = app.invoke({**initial})
-    headlines = result["headlines"]
-    yield f"Headlines:\n{headlines}\n\n"
-
-    # 2. Summarize
-    summary_result = summarize_news({**initial, "headlines": headlines, "topic": topic})
-    summary = summary_result["summary"]
-    yield f"Summary:\n{summary}\n\n"
-
-    # 3. Sentiment
-    sentiment_result = analyze_sentiment({**initial, "summary": summary})
-    sentiment = sentiment_result["sentiment"]
-    label = sentiment_result["sentiment_label"]
-    yield f"Sentiment: {sentiment} ({label})\n\n"
-
-    # 4. Final report
-    if label == "positive":
-        final = investor_summary({**initial, "summary": summary})["final_report"]
-        yield f"Investor Summary:\n{final}\n"
-    else:
-        final = public_summary({**initial, "summary": summary})["final_report"]
-        yield f"Public Summary:\n{final}\n"
+# Nodes whose LLM output is streamed token by token, with the header each section starts with
+TOKEN_STREAM_HEADERS = {
+    "investor_summary": "Investor Summary:\n",
+    "public_summary": "Public Summary:\n",
+}
+if os.getenv("STREAM_SUMMARY_TOKENS", "false").lower() == "true":
+    TOKEN_STREAM_HEADERS["summarize_news"] = "Summary:\n"
+
+def run_agent_for_topic(topic: str):
+    initial = initial_state(topic)
+    streamed = set()
+
+    # Each node runs once; its output is yielded as soon as it finishes,
+    # and the report sections are yielded token by token while they are generated
+    for mode, payload in app.stream(initial, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            message, metadata = payload
+            node = metadata.get("langgraph_node")
+            if node in TOKEN_STREAM_HEADERS and isinstance(message.content, str) and message.content:
+                if node not in streamed:
+                    streamed.add(node)
+                    yield TOKEN_STREAM_HEADERS[node]
+                yield message.content
+            continue
+
+        for node, update in payload.items():
+            if node in streamed:
+                # Text already went out as tokens; just close the section
+                yield "\n\n" if node == "summarize_news" else "\n"
+                continue
+            chunk = format_update(node, update or {})
+            if chunk:
+                yield chunk
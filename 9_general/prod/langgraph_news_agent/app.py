@@ -1,8 +1,17 @@
+import os
+
 from flask import Flask, request, Response, render_template
-from agent_workflow import run_agent_for_topic
+from agent_workflow import run_agent_for_topic, speculation_stats, news_client, node_memo
+from run_registry import RunRegistry
+from batch import BatchJobs
 
 app = Flask(__name__)
 
+# Concurrent requests for the same topic share one graph run
+runs = RunRegistry(run_agent_for_topic, replay_window=int(os.getenv("RUN_REPLAY_WINDOW", "60")))
+batch_jobs = BatchJobs(os.getenv("BATCH_OUTPUT_DIR", "batch_output"),
+                       concurrency=int(os.getenv("BATCH_CONCURRENCY", "10")))
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -14,11 +23,41 @@ def run_agent():
     if not topic:
         return {"error": "Missing topic"}, 400
 
-    def generate():
-        for chunk in run_agent_for_topic(topic):
-            yield chunk
+    run = runs.attach(topic)
+    return Response(run.subscribe(), mimetype="text/plain")
+
+@app.route("/run-batch", methods=["POST"])
+def run_batch():
+    data = request.json
+    topics = data.get("topics") if data else None
+    if not isinstance(topics, list) or not topics:
+        return {"error": "topics must be a non-empty list"}, 400
+
+    job_id = data.get("job_id")
+    if job_id is not None and not isinstance(job_id, str):
+        return {"error": "job_id must be a string"}, 400
+    try:
+        # Reusing the job_id of an interrupted job resumes it
+        job = batch_jobs.start([str(t) for t in topics], job_id=job_id)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return job, 202
+
+@app.route("/run-batch/<job_id>")
+def batch_status(job_id):
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return {"error": "Unknown job"}, 404
+    return job
 
-    return Response(generate(), mimetype="text/plain")
+@app.route("/stats")
+def stats():
+    return {
+        "speculation": speculation_stats,
+        "news_cache": news_client.stats,
+        "node_memo": node_memo.stats,
+        "runs": {**runs.stats, "live": runs.live_runs()},
+    }
 
 
 if __name__ == "__main__":
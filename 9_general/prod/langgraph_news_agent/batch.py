@@ -0,0 +1,165 @@
+# --------------------------
+# Concurrent multi-topic batch runs (CLI: python batch.py topics.txt)
+# --------------------------
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_workflow import app as graph, has_headlines, initial_state
+
+REPORT_KEYS = ["topic", "headlines", "summary", "sentiment", "sentiment_label", "final_report"]
+JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")  # Job ids double as output file names
+
+
+def load_completed(output_path):
+    """Topics that already have a successful record, so a rerun resumes."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["topic"])
+    return done
+
+
+async def run_batch(topics, output_path, concurrency=10, progress=None):
+    """
+    Runs the compiled graph for every topic with at most `concurrency` runs
+    in flight, appending one JSON line per finished topic to `output_path`.
+    `progress(done, total, record)` is called after each topic.
+    """
+    completed = load_completed(output_path)
+    pending = [t for t in dict.fromkeys(topics) if t not in completed]
+    total = len(pending)
+    finished = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+
+    # Sync nodes run on the loop's executor, so size it to the concurrency limit
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def run_one(topic):
+            nonlocal finished
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    result = await graph.ainvoke(initial_state(topic))
+                    record = {k: result.get(k, "") for k in REPORT_KEYS}
+                    if has_headlines(record):
+                        record["status"] = "ok"
+                    else:
+                        # A failed fetch still runs the graph; keep it retryable on resume
+                        record.update(status="error", error=record["headlines"])
+                except Exception as e:
+                    record = {"topic": topic, "status": "error", "error": str(e)}
+                record["seconds"] = round(time.monotonic() - started, 2)
+            async with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                finished += 1
+                if progress:
+                    progress(finished, total, record)
+
+        await asyncio.gather(*(run_one(t) for t in pending))
+    return {"total": total, "skipped": len(completed), "output": output_path}
+
+
+class BatchJobs:
+    """
+    Background batch jobs started over HTTP, tracked by id. Each job writes
+    to `<output_dir>/<job id>.jsonl`, so starting a job again with the id of
+    an interrupted one resumes it like a CLI rerun.
+    """
+
+    def __init__(self, output_dir, concurrency):
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self._jobs = {}
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _output(self, job_id):
+        return os.path.join(self.output_dir, f"{job_id}.jsonl")
+
+    def start(self, topics, job_id=None):
+        """
+        Starts a job for `topics`. Pass the `job_id` of an earlier job to
+        resume it; topics already written there are skipped. Raises ValueError
+        for an invalid id or one whose job is still running.
+        """
+        if job_id is not None and not JOB_ID_RE.match(job_id):
+            raise ValueError("job_id may only contain letters, digits, '-' and '_' (max 64)")
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            if job_id is None:
+                while True:
+                    self._started += 1
+                    job_id = time.strftime("%Y%m%d-%H%M%S") + f"-{self._started}"
+                    if job_id not in self._jobs and not os.path.exists(self._output(job_id)):
+                        break
+            elif self._jobs.get(job_id, {}).get("status") == "running":
+                raise ValueError(f"job {job_id} is still running")
+            job = {"id": job_id, "status": "running", "done": 0, "total": len(topics), "errors": 0,
+                   "output": self._output(job_id)}
+            self._jobs[job_id] = job
+            snapshot = dict(job)
+
+        def progress(done, total, record):
+            with self._lock:
+                job.update(done=done, total=total)
+                if record["status"] != "ok":
+                    job["errors"] += 1
+
+        def run():
+            try:
+                summary = asyncio.run(run_batch(topics, job["output"], self.concurrency, progress))
+                with self._lock:
+                    job.update(status="finished", total=summary["total"], skipped=summary["skipped"])
+            except Exception as e:
+                with self._lock:
+                    job.update(status="failed", error=str(e))
+
+        threading.Thread(target=run, daemon=True).start()
+        return snapshot
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the news agent for many topics at once.")
+    parser.add_argument("topics_file", help="one topic per line")
+    parser.add_argument("--output", default="digest.jsonl", help="JSONL output; rerun to resume")
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.topics_file, encoding="utf-8") as f:
+        topics = [line.strip() for line in f if line.strip()]
+
+    started = time.monotonic()
+
+    def progress(done, total, record):
+        status = "ok" if record["status"] == "ok" else f"error: {record.get('error')}"
+        print(f"[{done}/{total}] {record['topic']} ({record['seconds']}s) {status}", flush=True)
+
+    summary = asyncio.run(run_batch(topics, args.output, args.concurrency, progress))
+    print(f"Finished {summary['total']} topics in {time.monotonic() - started:.1f}s "
+          f"(skipped {summary['skipped']} already done) -> {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
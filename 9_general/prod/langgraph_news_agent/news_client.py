@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+
+class NewsFetchError(Exception):
+    """
+    Raised when headlines cannot be fetched. The message is safe to show to
+    users: it never includes the request URL or the API key.
+    """
+
+
+class NewsClient:
+    """
+    Pooled, cached NewsAPI client shared by the news agents.
+
+    Keeps one keep-alive session with timeouts and retries with backoff, and
+    caches headlines per topic. Fresh entries (younger than `ttl`) are served
+    directly. Stale entries (younger than `stale_ttl`) are served immediately
+    while a background refresh fetches new headlines; older entries are
+    dropped. The cache holds at most `max_entries` topics, evicting the least
+    recently used. An optional
+    `rate_limiter` (anything with a blocking acquire(), such as LangChain's
+    InMemoryRateLimiter) throttles the requests that actually reach NewsAPI.
+    """
+
+    def __init__(self, api_key, page_size=5, ttl=300, stale_ttl=3600,
+                 timeout=(3.05, 10), retries=3, backoff=0.5, pool_size=10, rate_limiter=None,
+                 max_entries=1024):
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.page_size = page_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        retry = Retry(total=retries, backoff_factor=backoff,
+                      status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+        self.session = requests.Session()
+        # Key goes in a header so it never appears in URLs, logs or error messages
+        self.session.headers["X-Api-Key"] = api_key or ""
+        self.session.mount("https://", HTTPAdapter(pool_connections=pool_size,
+                                                   pool_maxsize=pool_size, max_retries=retry))
+
+        self._cache = OrderedDict()  # topic key -> (headlines, fetched_at), least recently used first
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0, "evictions": 0}
+
+    def _fetch(self, topic):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        try:
+            r = self.session.get(
+                NEWS_API_URL,
+                params={"q": topic, "pageSize": self.page_size},
+                timeout=self.timeout,
+            )
+            r.raise_for_status()
+            return [a["title"] for a in r.json().get("articles", [])]
+        except requests.HTTPError as e:
+            raise NewsFetchError(f"NewsAPI returned HTTP {e.response.status_code}") from None
+        except requests.exceptions.RetryError:
+            # Retries on 429/5xx were exhausted
+            raise NewsFetchError("NewsAPI kept failing after retries (rate limited or unavailable)") from None
+        except Exception as e:
+            raise NewsFetchError(f"NewsAPI request failed ({type(e).__name__})") from None
+
+    def _store(self, key, headlines):
+        with self._lock:
+            self._cache[key] = (headlines, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _refresh(self, key, topic):
+        try:
+            self._store(key, self._fetch(topic))
+            with self._lock:
+                self.stats["refreshes"] += 1
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1  # Keep serving the stale entry
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_headlines(self, topic):
+        key = " ".join(topic.lower().split())
+        with self._lock:
+            entry = self._cache.get(key)
+            age = time.monotonic() - entry[1] if entry else None
+            if entry and age >= self.stale_ttl:
+                del self._cache[key]  # Too old to serve even while refreshing
+                entry = None
+            if entry:
+                self._cache.move_to_end(key)
+            if entry and age < self.ttl:
+                self.stats["hits"] += 1
+                return entry[0]
+            if entry and age < self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, topic), daemon=True).start()
+                return entry[0]
+            self.stats["misses"] += 1
+
+        try:
+            headlines = self._fetch(topic)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        self._store(key, headlines)
+        return headlines
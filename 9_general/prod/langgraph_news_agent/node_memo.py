@@ -0,0 +1,91 @@
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class NodeMemo:
+    """
+    Persistent memo of graph node outputs, keyed by a hash of the node name
+    and the state values the node reads. Entries expire after `ttl` seconds;
+    expired rows are deleted at startup and then at most every
+    `purge_interval` seconds, from set().
+    """
+
+    def __init__(self, path, ttl, namespace="", purge_interval=600):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.namespace = namespace  # e.g. the model name, so a model change invalidates
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS node_memo ("
+            " key TEXT PRIMARY KEY, node TEXT NOT NULL, output TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS node_memo_expires ON node_memo (expires_at)")
+        self._last_purge = None
+        self._maybe_purge()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, node, inputs):
+        payload = json.dumps([self.namespace, node, inputs], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, node, inputs):
+        row = self._connect().execute(
+            "SELECT output, expires_at FROM node_memo WHERE key = ?", (self._key(node, inputs),)
+        ).fetchone()
+        hit = row is not None and row[1] > time.time()
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+        return json.loads(row[0]) if hit else None
+
+    def set(self, node, inputs, output):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO node_memo (key, node, output, expires_at) VALUES (?, ?, ?, ?)",
+            (self._key(node, inputs), node, json.dumps(output), time.time() + self.ttl),
+        )
+        self._maybe_purge()
+
+    def purge_expired(self):
+        self._connect().execute("DELETE FROM node_memo WHERE expires_at <= ?", (time.time(),))
+
+    def _maybe_purge(self):
+        # Only one thread purges per interval
+        with self._lock:
+            if self._last_purge is not None and time.monotonic() - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = time.monotonic()
+        self.purge_expired()
+
+    def memoize(self, node, input_keys, cacheable=None, on_hit=None):
+        """
+        Wraps a node so a repeat call with the same `input_keys` values
+        returns the stored output instead of running the node.
+        `cacheable(inputs)` can veto storing, and `on_hit` is merged into
+        outputs served from the memo.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(state):
+                inputs = {k: state.get(k) for k in input_keys}
+                cached = self.get(node, inputs)
+                if cached is not None:
+                    return {**cached, **(on_hit or {})}
+                output = fn(state)
+                if cacheable is None or cacheable(inputs):
+                    self.set(node, inputs, output)
+                return output
+            return wrapper
+        return decorator
@@ -0,0 +1,106 @@
+import threading
+import time
+import traceback
+
+
+def _key(topic):
+    return " ".join(topic.lower().split())
+
+
+class Run:
+    """
+    One graph run whose chunks are broadcast to any number of subscribers.
+    Chunks are kept, so late joiners get a replay of everything so far.
+    """
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.chunks = []
+        self.done = False
+        self.finished_at = None
+        self.subscribers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+        sent = 0
+        while True:
+            with self._cond:
+                while sent >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[sent:]
+                finished = self.done
+            sent += len(pending)
+            yield from pending
+            if finished and sent >= len(self.chunks):
+                return
+
+
+class RunRegistry:
+    """
+    Topic-keyed registry of in-flight and recently finished runs.
+    The first request for a topic starts a run in the background; later
+    requests attach to it. Finished runs stay replayable for `replay_window` seconds;
+    failed runs are dropped as soon as they end so the next request retries.
+    """
+
+    def __init__(self, producer, replay_window=60):
+        self.producer = producer
+        self.replay_window = replay_window
+        self._runs = {}
+        self._lock = threading.Lock()
+        self.stats = {"runs_started": 0, "attached": 0, "replayed": 0, "failed": 0}
+
+    def _expired(self, run, now):
+        return run.done and now - run.finished_at >= self.replay_window
+
+    def attach(self, topic):
+        """
+        Returns the Run for `topic`, starting a new one if none is live.
+        """
+        key = _key(topic)
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, r in self._runs.items() if self._expired(r, now)]:
+                del self._runs[stale]
+
+            run = self._runs.get(key)
+            if run is not None:
+                self.stats["replayed" if run.done else "attached"] += 1
+                return run
+
+            run = self._runs[key] = Run(topic)
+            self.stats["runs_started"] += 1
+        threading.Thread(target=self._produce, args=(run,), daemon=True).start()
+        return run
+
+    def _produce(self, run):
+        try:
+            for chunk in self.producer(run.topic):
+                run.publish(chunk)
+        except Exception:
+            # Raw exception text can carry request details; keep it server-side
+            traceback.print_exc()
+            with self._lock:
+                self.stats["failed"] += 1
+                if self._runs.get(_key(run.topic)) is run:
+                    del self._runs[_key(run.topic)]
+            run.publish("\nError: the run failed, please try again.\n")
+        finally:
+            run.finish()
+
+    def live_runs(self):
+        with self._lock:
+            return sum(1 for run in self._runs.values() if not run.done)
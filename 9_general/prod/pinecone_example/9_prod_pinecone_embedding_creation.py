@@ -2,16 +2,20 @@
 from pinecone import Pinecone
 from dotenv import load_dotenv
 from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import os
 
 load_dotenv(override=True)
 
-# Clients
-client = OpenAI()
-pinecone_client = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# Connect to your index
-index = pinecone_client.Index("faq-embeddings")
+EMBEDDING_MODEL = "text-embedding-3-small"
+NAMESPACE = os.getenv("PINECONE_NAMESPACE", "ns-1")  # Same setting and default as app/config.py
+MANIFEST_PATH = os.getenv("FAQ_MANIFEST_PATH", "faq_manifest.json")
+EMBED_BATCH_SIZE = 2048   # Max inputs per embeddings request
+UPSERT_BATCH_SIZE = 100   # Vectors per upsert request
+DELETE_BATCH_SIZE = 1000  # IDs per delete request
+UPSERT_WORKERS = 4
 
 # FAQ dictionary
 faq_database = {
@@ -27,28 +31,125 @@ faq_database = {
     "Can I use multiple discount codes on a single order?": "No, only one discount code can be used...",
 }
 
-# Convert FAQs into upsertable format
-vectors_to_upsert = []
 
-for i, (question, answer) in enumerate(faq_database.items()):
-    # Create embedding for question + answer
-    text = question + "\n" + answer
+def faq_id(question):
+    """
+    Stable vector ID derived from the question, so reordering FAQs changes nothing.
+    """
+    return "faq-" + hashlib.sha1(question.encode("utf-8")).hexdigest()[:16]
+
+
+def existing_ids(index, faqs):
+    """
+    IDs currently stored in the namespace. list() only exists on serverless
+    indexes; elsewhere fall back to the positional IDs (faq-0, faq-1, ...)
+    written before IDs were derived from the question.
+    """
+    try:
+        return [vector_id for page in index.list(namespace=NAMESPACE) for vector_id in page]
+    except Exception:
+        return [f"faq-{i}" for i in range(len(faqs))]
+
+
+def content_hash(text):
+    return hashlib.sha256(f"{EMBEDDING_MODEL}\n{text}".encode("utf-8")).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
-    embedding = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    ).data[0].embedding
 
-    vectors_to_upsert.append({
-        "id": f"faq-{i}",
-        "values": embedding,
-        "metadata": {
-            "question": question,
-            "answer": answer
+def plan_changes(faqs, manifest):
+    """
+    Compares the FAQs against the manifest of content hashes.
+    Returns (records to embed and upsert, IDs to delete, new manifest).
+    """
+    new_manifest = {}
+    changed = []
+    for question, answer in faqs.items():
+        text = question + "\n" + answer
+        vector_id = faq_id(question)
+        digest = content_hash(text)
+        new_manifest[vector_id] = digest
+        if manifest.get(vector_id) != digest:
+            changed.append({"id": vector_id, "text": text, "question": question, "answer": answer})
+    removed = [vector_id for vector_id in manifest if vector_id not in new_manifest]
+    return changed, removed, new_manifest
+
+
+def embed_texts(client, texts):
+    """
+    Embeds texts in as few requests as the API input limit allows.
+    """
+    embeddings = []
+    for batch in chunks(texts, EMBED_BATCH_SIZE):
+        data = client.embeddings.create(model=EMBEDDING_MODEL, input=batch).data
+        embeddings.extend(item.embedding for item in sorted(data, key=lambda item: item.index))
+    return embeddings
+
+
+def ingest(faqs, client, index, manifest_path=MANIFEST_PATH):
+    first_run = not os.path.exists(manifest_path)
+    manifest = load_manifest(manifest_path)
+    changed, removed, new_manifest = plan_changes(faqs, manifest)
+    if first_run:
+        # Nothing is known about the namespace yet: remove whatever is not in the
+        # new manifest (e.g. faq-<n> vectors from older runs, which lack "text")
+        removed = [vector_id for vector_id in existing_ids(index, faqs) if vector_id not in new_manifest]
+
+    # Convert changed FAQs into upsertable format
+    embeddings = embed_texts(client, [record["text"] for record in changed])
+    vectors_to_upsert = [
+        {
+            "id": record["id"],
+            "values": embedding,
+            "metadata": {
+                "question": record["question"],
+                "answer": record["answer"],
+                "text": record["text"],
+            }
         }
-    })
+        for record, embedding in zip(changed, embeddings)
+    ]
+
+    # Upsert in sized chunks, several requests at a time
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as pool:
+        futures = [
+            pool.submit(index.upsert, vectors=batch, namespace=NAMESPACE)
+            for batch in chunks(vectors_to_upsert, UPSERT_BATCH_SIZE)
+        ]
+        for future in futures:
+            future.result()
+
+    for batch in chunks(removed, DELETE_BATCH_SIZE):
+        index.delete(ids=batch, namespace=NAMESPACE)
+
+    save_manifest(new_manifest, manifest_path)
+    return len(changed), len(removed), len(faqs) - len(changed)
+
+
+if __name__ == "__main__":
+    # Clients
+    client = OpenAI()
+    pinecone_client = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 
-# Upsert
-index.upsert(vectors=vectors_to_upsert, namespace="ns-1")
+    # Connect to your index
+    index = pinecone_client.Index("faq-embeddings")
 
-print(f"Uploaded {len(vectors_to_upsert)} FAQs to Pinecone.")
+    upserted, deleted, skipped = ingest(faq_database, client, index)
+    print(f"Uploaded {upserted} FAQs, deleted {deleted}, skipped {skipped} unchanged.")
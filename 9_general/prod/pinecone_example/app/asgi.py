@@ -0,0 +1,96 @@
+"""
+Async serving mode for the RAG API.
+
+Run with:  uvicorn asgi:app --app-dir app --host 0.0.0.0 --port 8000
+A single worker keeps hundreds of queries in flight on shared connection pools.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+import async_rag_model
+from async_rag_model import StageTimeout
+from cache import get_cached_response, set_cached_response, get_cache_stats
+from semantic_cache import SemanticCache
+from singleflight import AsyncSingleFlight, normalize_query
+from config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await async_rag_model.init_clients()
+    yield
+    await async_rag_model.close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=SEMANTIC_CACHE_TTL_SECONDS,
+)
+in_flight = AsyncSingleFlight()
+
+@app.get("/")
+async def root():
+    return {"message": "RAG API is running"}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "exact": get_cache_stats(),
+        "semantic": semantic_cache.stats(),
+        "singleflight": in_flight.stats(),
+    }
+
+async def answer_uncached(query):
+    """
+    Async counterpart of main.answer_uncached.
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        response = await async_rag_model.get_rag_response(query)
+        set_cached_response(query, response)
+        return {"response": response, "source": "RAG"}
+
+    query_embedding = await async_rag_model.embed_query(query)
+    match = semantic_cache.lookup(query_embedding)
+    if match:
+        response, similarity = match
+        set_cached_response(query, response)
+        return {"response": response, "source": "semantic_cache", "similarity": similarity}
+
+    response = await async_rag_model.get_rag_response(query, query_embedding=query_embedding)
+    set_cached_response(query, response)
+    semantic_cache.add(query_embedding, response)
+    return {"response": response, "source": "RAG"}
+
+@app.post("/query/")
+async def query_rag(data: dict):
+    """
+    Endpoint to handle RAG queries, same contract as the Flask /query/ route.
+    """
+    if not data or "query" not in data:
+        return JSONResponse({"error": "Query is required"}, status_code=400)
+
+    query = data["query"]
+
+    cached_response = get_cached_response(query)
+    if cached_response:
+        return {"response": cached_response, "source": "cache"}
+
+    try:
+        result, shared = await in_flight.do(normalize_query(query), lambda: answer_uncached(query))
+    except StageTimeout as e:
+        return JSONResponse({"error": str(e), "stage": e.stage}, status_code=504)
+    if shared:
+        result = {**result, "coalesced": True}
+        set_cached_response(query, result["response"])
+
+    return result
@@ -0,0 +1,129 @@
+import asyncio
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pinecone import PineconeAsyncio
+import httpx
+
+from config import (
+    CHAT_MODEL,
+    COMPLETION_TIMEOUT,
+    EMBEDDING_MODEL,
+    EMBEDDING_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    INDEX_NAME,
+    MAX_CONCURRENT_QUERIES,
+    OPENAI_API_KEY,
+    PINECONE_API_KEY,
+    PINECONE_HOST,
+    PINECONE_NAMESPACE,
+    PINECONE_TIMEOUT,
+)
+from prompts import build_prompt
+
+# Shared clients, created once per worker by init_clients()
+client = None
+pc = None
+index = None
+_query_slots = None
+
+
+class StageTimeout(Exception):
+    """
+    Raised when one stage of the RAG pipeline exceeds its time budget.
+    """
+
+    def __init__(self, stage, timeout):
+        super().__init__(f"{stage} timed out after {timeout}s")
+        self.stage = stage
+
+
+async def init_clients():
+    """
+    Opens the keep-alive OpenAI and Pinecone connection pools.
+    """
+    global client, pc, index, _query_slots
+    client = AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            )
+        ),
+    )
+    pc = PineconeAsyncio(api_key=PINECONE_API_KEY)
+    host = PINECONE_HOST
+    if not host:
+        host = (await pc.describe_index(INDEX_NAME)).host
+    index = pc.IndexAsyncio(host=host)
+    _query_slots = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+
+async def close_clients():
+    if index is not None:
+        await index.close()
+    if pc is not None:
+        await pc.close()
+    if client is not None:
+        await client.close()
+
+
+async def _with_timeout(stage, coro, timeout):
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeout(stage, timeout) from None
+
+
+async def _embed(query):
+    response = await _with_timeout(
+        "embedding",
+        client.embeddings.create(model=EMBEDDING_MODEL, input=query),
+        EMBEDDING_TIMEOUT,
+    )
+    return response.data[0].embedding
+
+
+async def embed_query(query):
+    """
+    Embeds one query, holding a query slot like get_rag_response so
+    standalone embedding calls are bounded by MAX_CONCURRENT_QUERIES too.
+    """
+    async with _query_slots:
+        return await _embed(query)
+
+
+async def retrieve(query_embedding, top_k=3):
+    results = await _with_timeout(
+        "pinecone",
+        index.query(vector=query_embedding, top_k=top_k, include_metadata=True,
+                    namespace=PINECONE_NAMESPACE),
+        PINECONE_TIMEOUT,
+    )
+    return [m["metadata"]["text"] for m in results["matches"]]
+
+
+async def generate(query, documents):
+    response = await _with_timeout(
+        "completion",
+        client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": build_prompt(query, documents)}],
+            max_tokens=150,
+        ),
+        COMPLETION_TIMEOUT,
+    )
+    return response.choices[0].message.content
+
+
+async def get_rag_response(query, query_embedding=None):
+    """
+    Async version of rag_model.get_rag_response.
+    At most MAX_CONCURRENT_QUERIES pipelines hit the upstream APIs at once.
+    """
+    async with _query_slots:
+        if query_embedding is None:
+            query_embedding = await _embed(query)  # Already holding a slot
+        documents = await retrieve(query_embedding)
+        return await generate(query, documents)
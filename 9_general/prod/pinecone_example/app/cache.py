@@ -1,22 +1,156 @@
-from datetime import datetime, timedelta
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from config import (
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_SWEEP_INTERVAL,
+    CACHE_TTL_SECONDS,
+)
+
+CACHE_EXPIRATION = timedelta(seconds=CACHE_TTL_SECONDS)  # Cache expiry time
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and approximate memory size.
+    Entries expire after `ttl` seconds; a background thread sweeps them out.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl, sweep_interval=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if sweep_interval:
+            sweeper = threading.Thread(
+                target=self._sweep_forever, args=(sweep_interval,), daemon=True
+            )
+            sweeper.start()
+
+    @staticmethod
+    def _sizeof(key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, key):
+        """
+        True if `key` has an unexpired entry. Unlike get(), leaves the hit/miss
+        counters and the LRU order alone.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def set(self, key, value):
+        size = self._sizeof(key, value)
+        if size > self.max_bytes:
+            return  # Never cache a single entry larger than the whole budget
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def sweep(self):
+        """
+        Removes all expired entries and returns how many were dropped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, expires_at, _) in self._data.items() if now >= expires_at]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def _sweep_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            self.sweep()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
 
 # In-memory cache
-cache = {}
-CACHE_EXPIRATION = timedelta(minutes=5)  # Cache expiry time
+cache = LRUCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl=CACHE_EXPIRATION.total_seconds(),
+    sweep_interval=CACHE_SWEEP_INTERVAL,
+)
 
 def get_cached_response(query):
     """
     Retrieves a cached response if available and not expired.
     """
-    cache_entry = cache.get(query)
-    if cache_entry:
-        response, timestamp = cache_entry
-        if datetime.now() - timestamp < CACHE_EXPIRATION:
-            return response
-    return None
+    return cache.get(query)
+
+def is_cached(query):
+    """
+    Checks for a live cached response without counting a hit or miss.
+    """
+    return cache.contains(query)
 
 def set_cached_response(query, response):
     """
     Stores the response in cache with the current timestamp.
     """
-    cache[query] = (response, datetime.now())
+    cache.set(query, response)
+
+def get_cache_stats():
+    """
+    Returns hit/miss/eviction counters for the response cache.
+    """
+    return cache.stats()
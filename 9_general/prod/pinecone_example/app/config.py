@@ -4,3 +4,66 @@ import os
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
+# Optional direct index host; skips the describe call (also used to point at local stand-ins)
+PINECONE_HOST = os.getenv("PINECONE_HOST")
+
+# Models and index used by the RAG pipeline
+INDEX_NAME = "faq-embeddings"
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHAT_MODEL = "gpt-4o-mini"
+
+# Response cache limits
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+
+# Semantic (embedding-similarity) answer cache
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
+# Async serving path (asgi.py)
+MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", "256"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "5"))
+PINECONE_TIMEOUT = float(os.getenv("PINECONE_TIMEOUT", "3"))
+COMPLETION_TIMEOUT = float(os.getenv("COMPLETION_TIMEOUT", "20"))
+
+# /query/batch limits
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "16"))
+# Longer queries are rejected per item (the embedding model caps input at 8191 tokens)
+BATCH_MAX_QUERY_CHARS = int(os.getenv("BATCH_MAX_QUERY_CHARS", "8000"))
+
+# Local in-memory replica of the Pinecone index (local_index.py)
+# Also read by 9_prod_pinecone_embedding_creation.py; keep the defaults in step
+PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE", "ns-1")
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "false").lower() == "true"
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "local_index")
+LOCAL_INDEX_SYNC_INTERVAL = int(os.getenv("LOCAL_INDEX_SYNC_INTERVAL", "300"))
+
+# Persistent query-embedding cache shared by all workers (embedding_cache.py)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+# Query log and cache pre-warming at startup (prewarm.py)
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "query_log.sqlite3")
+QUERY_LOG_FLUSH_INTERVAL = int(os.getenv("QUERY_LOG_FLUSH_INTERVAL", "10"))
+QUERY_LOG_MAX_ENTRIES = int(os.getenv("QUERY_LOG_MAX_ENTRIES", "10000"))
+QUERY_LOG_MAX_AGE_DAYS = float(os.getenv("QUERY_LOG_MAX_AGE_DAYS", "30"))
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "100"))
+PREWARM_MAX_SECONDS = float(os.getenv("PREWARM_MAX_SECONDS", "120"))
+PREWARM_WORKERS = int(os.getenv("PREWARM_WORKERS", "4"))
+PREWARM_BLOCKING = os.getenv("PREWARM_BLOCKING", "false").lower() == "true"
+
+# End-to-end deadline and hedged completions (hedging.py)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))  # Max share of completions that may hedge
@@ -0,0 +1,140 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+TRIM_EVERY = 256  # Writes between size checks
+TOUCH_INTERVAL = 3600  # Seconds before a hit refreshes last_used again
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed cache of query embeddings keyed by (model, normalized text).
+    WAL mode lets every worker process read and write the same file; vectors
+    are stored as float32 blobs.
+
+    The cache is only an optimization: SQLite errors (e.g. a busy write lock
+    under load) count as a miss or a skipped write rather than failing the
+    request. Hits refresh last_used at most every TOUCH_INTERVAL seconds, so
+    most reads never take the write lock.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(model, text):
+        return hashlib.sha256(f"{model}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _error(self):
+        with self._stats_lock:
+            self.errors += 1
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, model, text):
+        key = self._key(model, text)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT vector, last_used FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            self._error()
+            row = None
+        if row is None:
+            self._count(False)
+            return None
+        now = time.time()
+        if now - row[1] >= TOUCH_INTERVAL:
+            try:
+                with conn:
+                    conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                self._error()  # A stale last_used only affects trim order
+        self._count(True)
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def set(self, model, text, embedding):
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                    (self._key(model, text), model, blob, time.time()),
+                )
+        except sqlite3.Error:
+            self._error()
+            return
+        with self._stats_lock:
+            self._writes += 1
+            check_size = self._writes % TRIM_EVERY == 0
+        if check_size:
+            self.trim()
+
+    def trim(self):
+        """
+        Deletes least recently used rows beyond max_entries.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                excess = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+        except sqlite3.Error:
+            self._error()  # Retried at the next TRIM_EVERY writes
+
+    def stats(self):
+        entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "errors": self.errors,
+            }
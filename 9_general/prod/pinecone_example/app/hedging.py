@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from metrics import Counter
+
+HEDGES = Counter(
+    "rag_hedges_total", "Hedged completion events (fired, won, lost, suppressed).", ["event"])
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request runs out of its end-to-end time budget.
+    """
+
+
+def remaining(deadline):
+    """
+    Seconds left before `deadline` (a time.monotonic() value), or None for no deadline.
+    Raises DeadlineExceeded if it has already passed.
+    """
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent latencies used to pick the hedge delay.
+    """
+
+    def __init__(self, window=500, min_samples=20):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class _FirstToken(threading.Event):
+    """
+    Event an attempt sets when its first token arrives. wake() releases
+    waiters without counting as a token, for attempts that end without one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.at = None
+
+    def set(self):
+        if self.at is None:
+            self.at = time.monotonic()
+        super().set()
+
+    def wake(self):
+        super().set()
+
+
+class Hedger:
+    """
+    Runs an attempt and, if it has not produced a first token within the
+    tracked percentile of time-to-first-token, starts a duplicate and takes
+    whichever finishes first. At most `max_ratio` of calls may hedge.
+
+    An attempt is a callable `attempt(first_token, cancel, hedge)` that sets
+    the `first_token` event when output starts and stops early once `cancel`
+    is set; `hedge` is True for the duplicate.
+    """
+
+    def __init__(self, percentile=95, min_samples=20, max_ratio=0.1):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.ttft = LatencyTracker(min_samples=min_samples)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+
+    def _allow_hedge(self):
+        with self._lock:
+            if self.fired + 1 > self.max_ratio * self.calls:
+                return False
+            self.fired += 1
+            return True
+
+    def call(self, attempt, deadline=None):
+        with self._lock:
+            self.calls += 1
+        results = queue.Queue()
+        cancel = threading.Event()
+
+        def launch(name):
+            first_token = _FirstToken()
+            started = time.monotonic()
+
+            def run():
+                try:
+                    results.put((name, attempt(first_token, cancel, name == "hedge"), None))
+                except Exception as e:
+                    results.put((name, None, e))
+                finally:
+                    # Only a real first token is a latency sample; an attempt that
+                    # failed early just wakes the waiter
+                    if first_token.at is not None:
+                        self.ttft.record(first_token.at - started)
+                    first_token.wake()
+
+            threading.Thread(target=run, daemon=True).start()
+            return first_token
+
+        first_token = launch("primary")
+        attempts = 1
+        delay = self.ttft.percentile(self.percentile)
+        if delay is not None:
+            left = remaining(deadline)
+            if not first_token.wait(delay if left is None else min(delay, left)):
+                if self._allow_hedge():
+                    HEDGES.inc(event="fired")
+                    launch("hedge")
+                    attempts = 2
+                else:
+                    HEDGES.inc(event="suppressed")
+
+        error = None
+        try:
+            while attempts:
+                try:
+                    name, result, exc = results.get(timeout=remaining(deadline))
+                except queue.Empty:
+                    raise DeadlineExceeded("request deadline exceeded") from None
+                attempts -= 1
+                if exc is None:
+                    if name == "hedge":
+                        with self._lock:
+                            self.won += 1
+                        HEDGES.inc(event="won")
+                    elif attempts:
+                        HEDGES.inc(event="lost")
+                    return result
+                error = exc
+            raise error
+        finally:
+            cancel.set()  # Stop whichever attempt is still streaming
+
+    def stats(self):
+        with self._lock:
+            delay = self.ttft.percentile(self.percentile)
+            return {
+                "calls": self.calls,
+                "hedges_fired": self.fired,
+                "hedges_won": self.won,
+                "hedge_delay_seconds": delay if delay is not None else 0.0,
+            }
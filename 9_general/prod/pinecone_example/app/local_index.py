@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+FETCH_BATCH_SIZE = 100
+MANIFEST = "CURRENT"  # Names the version subdirectory readers should load
+KEEP_OLD_VERSIONS_SECONDS = 600  # Grace period before unreferenced versions are deleted
+
+
+class LocalIndex:
+    """
+    Exact cosine-similarity index over a float32 matrix.
+    Saved as a .npy file that is memory-mapped on load, so several worker
+    processes share the same pages of the OS cache.
+
+    Each save() writes a complete copy into a new version subdirectory and
+    then atomically repoints the CURRENT manifest at it, so workers sharing
+    a directory never load a half-written file or mix two versions.
+    """
+
+    def __init__(self, ids, metadata, vectors):
+        self.ids = ids
+        self.metadata = metadata
+        self.vectors = vectors  # (n, dim) float32, rows are unit-normalized
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, metadata, embeddings):
+        if not ids:
+            # Empty namespace: an empty replica, so a saved copy is cleared too
+            return cls([], [], np.zeros((0, 0), dtype=np.float32))
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return cls(list(ids), list(metadata), vectors / norms)
+
+    @classmethod
+    def from_pinecone(cls, index, namespace=""):
+        """
+        Copies every vector of a namespace out of Pinecone (or any object with
+        the same list/fetch interface).
+        """
+        ids, metadata, embeddings = [], [], []
+        for page in index.list(namespace=namespace):
+            page_ids = _page_ids(page)
+            for start in range(0, len(page_ids), FETCH_BATCH_SIZE):
+                batch = page_ids[start:start + FETCH_BATCH_SIZE]
+                fetched = index.fetch(ids=batch, namespace=namespace).vectors
+                for vector_id in batch:
+                    vector = fetched.get(vector_id)
+                    if vector is None:
+                        continue  # Deleted between list and fetch
+                    ids.append(vector_id)
+                    metadata.append(dict(vector.metadata or {}))
+                    embeddings.append(vector.values)
+        return cls.build(ids, metadata, embeddings)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        version = tempfile.mkdtemp(prefix="v-", dir=directory)
+        np.save(os.path.join(version, "vectors.npy"), self.vectors)
+        with open(os.path.join(version, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "metadata": self.metadata}, f)
+
+        fd, manifest = tempfile.mkstemp(prefix=MANIFEST + ".", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(version))
+        previous = _current_version(directory)
+        os.replace(manifest, os.path.join(directory, MANIFEST))
+
+        # Other versions may still be loading in another worker or still being
+        # written by a concurrent save(), so only old ones are removed (mapped
+        # files stay readable after unlinking)
+        cutoff = time.time() - KEEP_OLD_VERSIONS_SECONDS
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name in (os.path.basename(version), previous) or not name.startswith(("v-", MANIFEST + ".")):
+                continue
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+            except OSError:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+    @classmethod
+    def load(cls, directory):
+        version = _current_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"no local index saved in {directory}")
+        path = os.path.join(directory, version)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        if len(meta["ids"]) != len(vectors):
+            raise ValueError("local index files are out of sync")
+        return cls(meta["ids"], meta["metadata"], vectors)
+
+    def query(self, vector, top_k=3):
+        """
+        Returns matches shaped like Pinecone's: dicts with id, score and metadata.
+        """
+        if not self.ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.vectors @ query
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {"id": self.ids[i], "score": float(scores[i]), "metadata": self.metadata[i]}
+            for i in best
+        ]
+
+
+def _current_version(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _page_ids(page):
+    # Older clients yield plain lists of IDs, newer ones ListResponse pages
+    if isinstance(page, list):
+        return page
+    return [item.id for item in page.vectors]
+
+
+class LocalReplica:
+    """
+    Keeps a LocalIndex in sync with Pinecone in the background.
+    Pinecone stays the source of truth; query() returns None until a
+    replica is available so callers can fall back to it.
+    """
+
+    def __init__(self, source, namespace="", directory=None):
+        self.source = source
+        self.namespace = namespace
+        self.directory = directory
+        self.current = None
+        self.syncs = 0
+        self.sync_errors = 0
+        self.local_queries = 0
+        if directory and _current_version(directory) is not None:
+            try:
+                self.current = LocalIndex.load(directory)
+            except (OSError, ValueError):
+                self.current = None
+
+    def refresh(self):
+        fresh = LocalIndex.from_pinecone(self.source, self.namespace)
+        if self.directory:
+            fresh.save(self.directory)
+        self.current = fresh  # Atomic swap; in-progress queries keep the old one
+        self.syncs += 1
+        return fresh
+
+    def start(self, interval):
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception:
+                    self.sync_errors += 1
+                stop.wait(interval)
+
+        stop = threading.Event()
+        threading.Thread(target=run, daemon=True).start()
+        return stop
+
+    def query(self, vector, top_k=3):
+        current = self.current
+        if current is None or len(current) == 0:
+            return None
+        self.local_queries += 1
+        return current.query(vector, top_k)
+
+    def stats(self):
+        current = self.current
+        return {
+            "vectors": len(current) if current is not None else 0,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "local_queries": self.local_queries,
+        }
@@ -1,19 +1,149 @@
-from flask import Flask, request, jsonify
-from rag_model import get_rag_response
-from cache import get_cached_response, set_cached_response
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, g, request, jsonify
+from flask.helpers import get_debug_flag
+from werkzeug.serving import is_running_from_reloader
+from openai import APITimeoutError
+from rag_model import (
+    embed_queries,
+    embed_query,
+    embedding_cache,
+    get_rag_response,
+    hedger,
+    local_replica,
+    new_deadline,
+    retrieve,
+    stream_completion,
+)
+from hedging import DeadlineExceeded
+from cache import get_cached_response, is_cached, set_cached_response, get_cache_stats
+from semantic_cache import SemanticCache
+from singleflight import SingleFlight, normalize_query
+from prewarm import QueryLog, prewarm
+from metrics import REQUEST_LATENCY, REQUESTS, render, render_gauges, track
+from config import (
+    BATCH_MAX_QUERIES,
+    BATCH_MAX_QUERY_CHARS,
+    BATCH_MAX_WORKERS,
+    PREWARM_BLOCKING,
+    PREWARM_ENABLED,
+    PREWARM_MAX_SECONDS,
+    PREWARM_TOP_N,
+    PREWARM_WORKERS,
+    QUERY_LOG_FLUSH_INTERVAL,
+    QUERY_LOG_MAX_AGE_DAYS,
+    QUERY_LOG_MAX_ENTRIES,
+    QUERY_LOG_PATH,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
 
 
 app = Flask(__name__)
 
+semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=SEMANTIC_CACHE_TTL_SECONDS,
+)
+in_flight = SingleFlight()
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS)
+query_log = QueryLog(
+    QUERY_LOG_PATH,
+    flush_interval=QUERY_LOG_FLUSH_INTERVAL,
+    max_entries=QUERY_LOG_MAX_ENTRIES,
+    max_age_days=QUERY_LOG_MAX_AGE_DAYS,
+)
+prewarm_stats = {"status": "disabled"}
+
+@app.before_request
+def start_timer():
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    # Streamed bodies are produced after this hook runs; they record their own latency
+    if request.endpoint and request.endpoint != "metrics_endpoint" and not response.is_streamed:
+        REQUEST_LATENCY.observe(time.perf_counter() - g.start_time, endpoint=request.endpoint)
+    return response
+
 @app.route("/", methods=["GET"])
 def root():
     return jsonify({"message": "RAG API is running"})
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    Exposes response cache size and hit/miss/eviction counters.
+    """
+    stats = {
+        "exact": get_cache_stats(),
+        "semantic": semantic_cache.stats(),
+        "singleflight": in_flight.stats(),
+        "prewarm": prewarm_stats,
+    }
+    if embedding_cache is not None:
+        stats["embeddings"] = embedding_cache.stats()
+    if local_replica is not None:
+        stats["local_index"] = local_replica.stats()
+    if hedger is not None:
+        stats["hedging"] = hedger.stats()
+    return jsonify(stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Prometheus text exposition of latency histograms, counters and cache gauges.
+    """
+    gauges = render_gauges("rag_cache_exact", get_cache_stats())
+    gauges += render_gauges("rag_cache_semantic", semantic_cache.stats())
+    gauges += render_gauges("rag_singleflight", in_flight.stats())
+    if embedding_cache is not None:
+        gauges += render_gauges("rag_embedding_cache", embedding_cache.stats())
+    if local_replica is not None:
+        gauges += render_gauges("rag_local_index", local_replica.stats())
+    if hedger is not None:
+        gauges += render_gauges("rag_hedging", hedger.stats())
+    return Response(render(gauges), mimetype="text/plain; version=0.0.4")
+
+def answer_uncached(query):
+    """
+    Answers a query that missed the exact-match cache.
+    Tries the semantic cache, then falls back to the full RAG pipeline.
+    """
+    deadline = new_deadline()
+    if not SEMANTIC_CACHE_ENABLED:
+        response = get_rag_response(query, deadline=deadline)
+        set_cached_response(query, response)
+        return {"response": response, "source": "RAG"}
+
+    # Paraphrases of an earlier query reuse its answer
+    query_embedding = embed_query(query, deadline=deadline)
+    with track("semantic_cache"):
+        match = semantic_cache.lookup(query_embedding)
+    if match:
+        response, similarity = match
+        set_cached_response(query, response)
+        return {"response": response, "source": "semantic_cache", "similarity": similarity}
+
+    # Get fresh RAG response, reusing the embedding we already paid for
+    response = get_rag_response(query, query_embedding=query_embedding, deadline=deadline)
+    set_cached_response(query, response)
+    semantic_cache.add(query_embedding, response)
+    return {"response": response, "source": "RAG"}
+
 @app.route("/query/", methods=["POST"])
 def query_rag():
     """
     Endpoint to handle RAG queries.
-    Checks the cache first before generating a response.
+    Checks the exact-match cache, then the semantic cache, before generating a response.
+    Concurrent requests for the same normalized query share one computation.
     """
     data = request.get_json()
 
@@ -21,17 +151,225 @@ def query_rag():
         return jsonify({"error": "Query is required"}), 400
 
     query = data["query"]
+    query_log.record(query)
 
     # Check cache first
-    cached_response = get_cached_response(query)
+    with track("cache_lookup"):
+        cached_response = get_cached_response(query)
     if cached_response:
+        REQUESTS.inc(endpoint="query", source="cache")
         return jsonify({"response": cached_response, "source": "cache"})
 
-    # Get fresh RAG response
-    response = get_rag_response(query)
-    set_cached_response(query, response)
+    try:
+        result, shared = in_flight.do(normalize_query(query), lambda: answer_uncached(query))
+    except (DeadlineExceeded, APITimeoutError) as e:
+        REQUESTS.inc(endpoint="query", source="deadline_exceeded")
+        return jsonify({"error": str(e)}), 504
+    if shared:
+        result = {**result, "coalesced": True}
+        set_cached_response(query, result["response"])
+    REQUESTS.inc(endpoint="query", source="coalesced" if shared else result["source"])
+
+    return jsonify(result)
+
+@app.route("/query/batch", methods=["POST"])
+def query_rag_batch():
+    """
+    Answers a list of queries in one request.
+    Cache misses are embedded with a single embeddings call, then the Pinecone
+    queries and completions run on a bounded worker pool. Results keep input order.
+    """
+    data = request.get_json()
+
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({"error": "queries must be a list of strings"}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {BATCH_MAX_QUERIES} queries per batch"}), 400
+
+    results = [None] * len(queries)
+    pending = {}  # query -> positions still needing an answer
+    for i, query in enumerate(queries):
+        # Invalid items get their own error instead of failing the batch
+        if not query.strip():
+            results[i] = {"query": query, "error": "Query is empty"}
+            continue
+        if len(query) > BATCH_MAX_QUERY_CHARS:
+            results[i] = {"query": query, "error": f"Query is longer than {BATCH_MAX_QUERY_CHARS} characters"}
+            continue
+        query_log.record(query)
+        with track("cache_lookup"):
+            cached_response = get_cached_response(query)
+        if cached_response:
+            results[i] = {"query": query, "response": cached_response, "source": "cache"}
+        else:
+            pending.setdefault(query, []).append(i)
+
+    if pending:
+        unique = list(pending)
+        try:
+            embeddings = embed_queries(unique)
+        except Exception:
+            # One bad input fails the whole embeddings request; embed one by one
+            # so only the offending items carry the error
+            embeddings = []
+            for query in unique:
+                try:
+                    embeddings.append(embed_query(query))
+                except Exception as e:
+                    embeddings.append(e)
+
+        to_generate = []
+        for query, query_embedding in zip(unique, embeddings):
+            if isinstance(query_embedding, Exception):
+                for i in pending[query]:
+                    results[i] = {"query": query, "error": str(query_embedding)}
+                continue
+            match = None
+            if SEMANTIC_CACHE_ENABLED:
+                with track("semantic_cache"):
+                    match = semantic_cache.lookup(query_embedding)
+            if match:
+                response, similarity = match
+                set_cached_response(query, response)
+                for i in pending[query]:
+                    results[i] = {"query": query, "response": response,
+                                  "source": "semantic_cache", "similarity": similarity}
+            else:
+                to_generate.append((query, query_embedding))
+
+        futures = [
+            (query, query_embedding, batch_executor.submit(get_rag_response, query, query_embedding))
+            for query, query_embedding in to_generate
+        ]
+        for query, query_embedding, future in futures:
+            try:
+                response = future.result()
+            except Exception as e:
+                item = {"query": query, "error": str(e)}
+            else:
+                set_cached_response(query, response)
+                if SEMANTIC_CACHE_ENABLED:
+                    semantic_cache.add(query_embedding, response)
+                item = {"query": query, "response": response, "source": "RAG"}
+            for i in pending[query]:
+                results[i] = item
+
+    for item in results:
+        REQUESTS.inc(endpoint="batch", source=item.get("source", "error"))
+    return jsonify({"results": results})
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/query/stream", methods=["POST"])
+def query_rag_stream():
+    """
+    Streams a RAG answer as server-sent events.
+    Sends the retrieved context IDs first, then answer tokens as they are
+    generated. The full answer is cached once the stream finishes.
+    """
+    data = request.get_json()
+
+    if not data or "query" not in data:
+        return jsonify({"error": "Query is required"}), 400
+
+    query = data["query"]
+    query_log.record(query)
+    started = g.start_time
+
+    def generate():
+        try:
+            yield from events()
+        finally:
+            # Runs once the last event is sent (or the client disconnects)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint="query_rag_stream")
+
+    def events():
+        with track("cache_lookup"):
+            cached_response = get_cached_response(query)
+        if cached_response:
+            REQUESTS.inc(endpoint="stream", source="cache")
+            yield sse("context", {"ids": [], "source": "cache"})
+            yield sse("token", {"text": cached_response})
+            yield sse("done", {"source": "cache"})
+            return
+
+        query_embedding = embed_query(query)
+        if SEMANTIC_CACHE_ENABLED:
+            with track("semantic_cache"):
+                match = semantic_cache.lookup(query_embedding)
+            if match:
+                response, similarity = match
+                set_cached_response(query, response)
+                REQUESTS.inc(endpoint="stream", source="semantic_cache")
+                yield sse("context", {"ids": [], "source": "semantic_cache"})
+                yield sse("token", {"text": response})
+                yield sse("done", {"source": "semantic_cache", "similarity": similarity})
+                return
+
+        matches = retrieve(query_embedding)
+        yield sse("context", {"ids": [m["id"] for m in matches], "source": "RAG"})
+
+        documents = [m["metadata"]["text"] for m in matches]
+        parts = []
+        try:
+            for delta in stream_completion(query, documents):
+                parts.append(delta)
+                yield sse("token", {"text": delta})
+        except Exception as e:
+            REQUESTS.inc(endpoint="stream", source="error")
+            yield sse("error", {"error": str(e)})
+            return
+
+        response = "".join(parts)
+        set_cached_response(query, response)
+        if SEMANTIC_CACHE_ENABLED:
+            semantic_cache.add(query_embedding, response)
+        REQUESTS.inc(endpoint="stream", source="RAG")
+        yield sse("done", {"source": "RAG"})
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def warm_cache():
+    """
+    Pre-computes answers for the hottest logged queries into the response,
+    semantic and embedding caches.
+    """
+    prewarm_stats["status"] = "running"
+    stats = prewarm(
+        query_log.top(PREWARM_TOP_N),
+        answer=lambda q: in_flight.do(normalize_query(q), lambda: answer_uncached(q)),
+        is_cached=is_cached,
+        budget_seconds=PREWARM_MAX_SECONDS,
+        workers=PREWARM_WORKERS,
+    )
+    prewarm_stats.update(stats, status="done")
+
+def start_prewarm():
+    prewarm_thread = threading.Thread(target=warm_cache, daemon=True)
+    prewarm_thread.start()
+    if PREWARM_BLOCKING:
+        prewarm_thread.join(PREWARM_MAX_SECONDS)
+
+DEBUG = True  # Used by app.run below; enables the Werkzeug reloader
+
+def reloader_watcher():
+    """
+    True in the Werkzeug reloader's watcher process, which imports this module
+    but never serves requests. Only its child (WERKZEUG_RUN_MAIN set) serves.
+    """
+    if is_running_from_reloader():
+        return False
+    if __name__ == "__main__":
+        return DEBUG
+    return os.environ.get("FLASK_RUN_FROM_CLI") == "true" and get_debug_flag()
 
-    return jsonify({"response": response, "source": "RAG"})
+# Warm only processes that will serve traffic, so the watcher does not spend
+# PREWARM_TOP_N RAG calls (or delay startup) on every deploy
+if PREWARM_ENABLED and not reloader_watcher():
+    start_prewarm()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
+    app.run(host="0.0.0.0", port=8000, debug=DEBUG)
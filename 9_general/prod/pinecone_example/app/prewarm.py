@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from singleflight import normalize_query
+
+
+class QueryLog:
+    """
+    Persistent frequency log of queries, shared by workers through SQLite.
+    Counts are buffered in memory and flushed in the background so the
+    request path never waits on disk. Each flush drops queries not seen for
+    `max_age_days` and keeps only the `max_entries` most frequent ones.
+    """
+
+    def __init__(self, path, flush_interval=10, max_entries=10000, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._pending = Counter()
+        self._latest = {}  # normalized -> most recent raw text
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS queries ("
+                " key TEXT PRIMARY KEY,"
+                " query TEXT NOT NULL,"
+                " count INTEGER NOT NULL,"
+                " last_seen REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS queries_rank ON queries (count, last_seen)")
+        if flush_interval:
+            threading.Thread(target=self._flush_forever, args=(flush_interval,), daemon=True).start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def record(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            self._pending[key] += 1
+            self._latest[key] = query
+
+    def flush(self):
+        with self._lock:
+            pending, latest = self._pending, self._latest
+            self._pending, self._latest = Counter(), {}
+        if not pending:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO queries (key, query, count, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET count = count + excluded.count,"
+                    " query = excluded.query, last_seen = excluded.last_seen",
+                    [(key, latest[key], count, now) for key, count in pending.items()],
+                )
+                self._prune(conn, now)
+        finally:
+            conn.close()
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM queries WHERE last_seen < ?", (now - self.max_age_days * 86400,))
+        if conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0] > self.max_entries:
+            conn.execute(
+                "DELETE FROM queries WHERE key NOT IN ("
+                " SELECT key FROM queries ORDER BY count DESC, last_seen DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def _flush_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # Counts are best-effort; try again next interval
+
+    def top(self, n):
+        """
+        Returns the raw text of the n most frequent queries, hottest first.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT query FROM queries ORDER BY count DESC, last_seen DESC LIMIT ?", (n,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+
+def prewarm(queries, answer, is_cached, budget_seconds, workers):
+    """
+    Answers `queries` (hottest first) so their results land in the caches.
+    Stops submitting work once the time budget is spent.
+    """
+    stats = {"candidates": len(queries), "warmed": 0, "already_cached": 0,
+             "failed": 0, "skipped_budget": 0, "seconds": 0.0}
+    start = time.monotonic()
+    deadline = start + budget_seconds
+
+    def warm(query):
+        if time.monotonic() >= deadline:
+            return "skipped_budget"
+        if is_cached(query):
+            return "already_cached"
+        try:
+            answer(query)
+        except Exception:
+            return "failed"
+        return "warmed"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for outcome in pool.map(warm, queries):
+            stats[outcome] += 1
+    stats["seconds"] = round(time.monotonic() - start, 3)
+    return stats
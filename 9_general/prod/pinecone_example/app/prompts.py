@@ -0,0 +1,5 @@
+def build_prompt(query, documents):
+    """
+    Builds the completion prompt from the query and retrieved FAQ texts.
+    """
+    return f"Query: {query}\n\nContext:\n" + "\n".join(documents) + "\n\nAnswer:"
@@ -1,35 +1,197 @@
+import time
+
 from openai import OpenAI
 from pinecone import Pinecone
-from config import OPENAI_API_KEY, PINECONE_API_KEY
+from config import (
+    CHAT_MODEL,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    HEDGE_ENABLED,
+    HEDGE_MAX_RATIO,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    INDEX_NAME,
+    LOCAL_INDEX_DIR,
+    LOCAL_INDEX_ENABLED,
+    LOCAL_INDEX_SYNC_INTERVAL,
+    OPENAI_API_KEY,
+    PINECONE_API_KEY,
+    PINECONE_HOST,
+    PINECONE_NAMESPACE,
+    REQUEST_DEADLINE_SECONDS,
+)
+from embedding_cache import EmbeddingCache
+from hedging import Hedger, remaining
+from local_index import LocalReplica
+from metrics import record_usage, track
+from prompts import build_prompt
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 pc = Pinecone(api_key=PINECONE_API_KEY)
 
-index = pc.Index("faq-embeddings")
+index = pc.Index(host=PINECONE_HOST) if PINECONE_HOST else pc.Index(INDEX_NAME)
 
-def get_rag_response(query):
+# Optional local replica answers top-k in-process; Pinecone is the fallback
+local_replica = None
+if LOCAL_INDEX_ENABLED:
+    local_replica = LocalReplica(index, namespace=PINECONE_NAMESPACE, directory=LOCAL_INDEX_DIR)
+    local_replica.start(LOCAL_INDEX_SYNC_INTERVAL)
 
-    # Create embedding
-    query_embedding = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=query
-    ).data[0].embedding
+# Query embeddings persisted across workers and restarts
+embedding_cache = None
+if EMBEDDING_CACHE_ENABLED:
+    embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
 
-    # Query Pinecone
-    results = index.query(
-        vector=query_embedding,
-        top_k=3,
-        include_metadata=True
-    )
+# Duplicates slow completions when enabled
+hedger = None
+if HEDGE_ENABLED:
+    hedger = Hedger(percentile=HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES, max_ratio=HEDGE_MAX_RATIO)
+
+def new_deadline(seconds=REQUEST_DEADLINE_SECONDS):
+    """
+    Returns the time.monotonic() value by which a request must finish.
+    """
+    return time.monotonic() + seconds
+
+def _openai(deadline, **options):
+    # Per-request timeout capped by whatever is left of the deadline
+    left = remaining(deadline)
+    return client.with_options(timeout=left, **options) if left is not None else client
+
+def embed_query(query, deadline=None):
+    """
+    Creates the embedding used both for retrieval and the semantic cache.
+    """
+    return embed_queries([query], deadline=deadline)[0]
+
+def embed_queries(queries, deadline=None):
+    """
+    Embeds many queries, preserving order. Cached embeddings are reused and
+    all misses go out in a single embeddings request.
+    """
+    embeddings = [None] * len(queries)
+    if embedding_cache is not None:
+        with track("embedding_cache"):
+            embeddings = [embedding_cache.get(EMBEDDING_MODEL, q) for q in queries]
+
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        with track("embedding"):
+            result = _openai(deadline).embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[queries[i] for i in missing]
+            )
+        record_usage(result.usage, "embedding")
+        for item in result.data:
+            i = missing[item.index]
+            embeddings[i] = item.embedding
+            if embedding_cache is not None:
+                embedding_cache.set(EMBEDDING_MODEL, queries[i], item.embedding)
+    return embeddings
+
+def retrieve(query_embedding, top_k=3, deadline=None):
+    """
+    Returns the top-k matches (with metadata) for an embedding, from the
+    local replica when it is ready and from Pinecone otherwise.
+    """
+    if local_replica is not None:
+        try:
+            with track("retrieval_local"):
+                matches = local_replica.query(query_embedding, top_k)
+        except Exception:
+            matches = None
+        if matches is not None:
+            return matches
+
+    remaining(deadline)
+    with track("retrieval_pinecone"):
+        results = index.query(
+            vector=query_embedding,
+            top_k=top_k,
+            include_metadata=True,
+            namespace=PINECONE_NAMESPACE
+        )
+    return results["matches"]
 
-    documents = [m["metadata"]["text"] for m in results["matches"]]
+def stream_completion(query, documents):
+    """
+    Yields answer text deltas as the completion is generated.
+    """
+    with track("prompt"):
+        prompt = build_prompt(query, documents)
 
-    prompt = f"Query: {query}\n\nContext:\n" + "\n".join(documents) + "\n\nAnswer:"
+    with track("completion_stream"):
+        stream = client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=150,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            record_usage(chunk.usage, "completion")
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+def _complete(prompt, deadline):
+    completion = _openai(deadline).chat.completions.create(
+        model=CHAT_MODEL,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=150
-    ).choices[0].message.content
+    )
+    record_usage(completion.usage, "completion")
+    return completion.choices[0].message.content
+
+def _complete_hedged(prompt, deadline):
+    def attempt(first_token, cancel, hedge):
+        # The primary keeps the SDK's retries for transient 429/5xx (most calls
+        # never hedge); the hedge is already the retry, so it makes one try
+        openai_client = _openai(deadline, max_retries=0) if hedge else _openai(deadline)
+        stream = openai_client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=150,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        parts = []
+        try:
+            for chunk in stream:
+                record_usage(chunk.usage, "completion")
+                if cancel.is_set():
+                    return None
+                if chunk.choices and chunk.choices[0].delta.content:
+                    first_token.set()
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            stream.close()
+        return "".join(parts)
+
+    return hedger.call(attempt, deadline)
+
+def get_rag_response(query, query_embedding=None, deadline=None):
+    """
+    Full RAG pipeline. Every stage shares one end-to-end deadline; a stage
+    that would start or run past it raises DeadlineExceeded.
+    """
+    if deadline is None:
+        deadline = new_deadline()
+
+    # Create embedding (callers that already have one can pass it in)
+    if query_embedding is None:
+        query_embedding = embed_query(query, deadline=deadline)
+
+    # Query Pinecone
+    matches = retrieve(query_embedding, deadline=deadline)
+
+    documents = [m["metadata"]["text"] for m in matches]
+
+    with track("prompt"):
+        prompt = build_prompt(query, documents)
 
-    return response
+    with track("completion"):
+        if hedger is not None:
+            return _complete_hedged(prompt, deadline)
+        return _complete(prompt, deadline)
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    In-process vector index of past query embeddings and their answers.
+    A lookup returns the cached answer of the most similar live entry when
+    its cosine similarity is at least `threshold`.
+    """
+
+    def __init__(self, threshold, max_entries, ttl):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._vectors = None  # (max_entries, dim) float32, rows are unit-normalized
+        self._answers = [None] * max_entries
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, embedding):
+        """
+        Returns (answer, similarity) for the closest match, or None.
+        """
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if self._size == 0 or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            scores = self._vectors[:self._size] @ query
+            scores[self._expires[:self._size] <= now] = -np.inf
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            return self._answers[best], score
+
+    def add(self, embedding, answer):
+        vec = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vec.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+                self._size = 0
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                # Reuse an expired slot if there is one, otherwise the least recently used
+                expired = np.flatnonzero(self._expires <= now)
+                slot = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = vec
+            self._answers[slot] = answer
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
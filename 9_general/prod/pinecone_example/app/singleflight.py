@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+
+def normalize_query(query):
+    """
+    Canonical form used to decide whether two queries are "the same".
+    """
+    return " ".join(query.lower().split())
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls: while a call for `key` is in flight, other
+    threads asking for the same key block on it and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per in-flight key. Returns (result, shared) where
+        `shared` is True if this caller reused another thread's result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight for the ASGI app: concurrent
+    coroutines for the same key await one shared task.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Awaits fn() once per in-flight key. Returns (result, shared).
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        self.executed += 1
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so a disconnecting leader does not cancel the shared work
+        return await asyncio.shield(task), False
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,246 @@
+"""
+Local stand-ins for the OpenAI and Pinecone HTTP APIs used by the RAG service.
+
+Each endpoint sleeps for a configurable latency (plus jitter) so benchmarks
+can model real upstreams without network access or API keys.
+
+    python bench/fake_upstreams.py --port 9100 --completion-latency 400
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_DIM = 256
+
+FAQ_TEXTS = [
+    "What is your return policy?\nOur return policy allows customers to return products within 30 days of purchase...",
+    "How do I track my order?\nYou can track your order using the tracking number provided...",
+    "What payment methods do you accept?\nWe accept credit cards, PayPal, and Apple Pay...",
+    "Can I change or cancel my order after it's been placed?\nOnce an order has been placed, we cannot modify it...",
+    "What are your shipping options?\nWe offer standard, expedited, and overnight shipping...",
+    "How do I reset my account password?\nTo reset your password, click 'Forgot Password'...",
+    "Do you ship internationally?\nYes, we ship to select international destinations...",
+    "What do I do if I receive a damaged or defective product?\nContact support within 48 hours...",
+    "How do I contact customer support?\nEmail support@ourcompany.com or call 1-800-123-4567...",
+    "Can I use multiple discount codes on a single order?\nNo, only one discount code can be used...",
+]
+
+
+def fake_embedding(text):
+    """
+    Deterministic bag-of-words hash embedding: texts that share words are
+    close in cosine space, which is enough to exercise the semantic cache.
+    """
+    vector = [0.0] * EMBEDDING_DIM
+    for word in re.findall(r"[a-z0-9']+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % EMBEDDING_DIM] += 1.0 if digest[4] % 2 else -1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+FAQ_VECTORS = [(f"faq-{i}", fake_embedding(text), text) for i, text in enumerate(FAQ_TEXTS)]
+
+
+class Latency:
+    def __init__(self, embedding, pinecone, completion, token, jitter):
+        self.ms = {"embedding": embedding, "pinecone": pinecone, "completion": completion, "token": token}
+        self.jitter = jitter
+
+    def sleep(self, stage):
+        base = self.ms[stage]
+        if base > 0:
+            time.sleep(max(0.0, random.gauss(base, base * self.jitter)) / 1000)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    latency = None
+    counts = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        if path == "/stats":
+            with self.lock:
+                return self._send_json(dict(self.counts))
+        # list/fetch let the app's local replica sync against this server
+        if path == "/vectors/list":
+            return self._list(parse_qs(url.query))
+        if path == "/vectors/fetch":
+            return self._fetch(parse_qs(url.query))
+        self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._read_json()
+        path = self.path.rstrip("/")
+        if path.endswith("/embeddings"):
+            return self._embeddings(body)
+        if path.endswith("/chat/completions"):
+            return self._chat(body)
+        if path.endswith("/query"):
+            return self._query(body)
+        self._send_json({"error": f"unknown path {self.path}"}, 404)
+
+    def _embeddings(self, body):
+        self._count("embeddings")
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        self.latency.sleep("embedding")
+        tokens = sum(len(text.split()) for text in inputs)
+        self._send_json({
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+                     for i, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _query(self, body):
+        self._count("pinecone_query")
+        self.latency.sleep("pinecone")
+        query = body.get("vector") or []
+        scored = sorted(
+            ((sum(a * b for a, b in zip(query, vector)), vector_id, text)
+             for vector_id, vector, text in FAQ_VECTORS),
+            reverse=True,
+        )[:body.get("topK", 3)]
+        self._send_json({
+            "matches": [{"id": vector_id, "score": score, "metadata": {"text": text}}
+                        for score, vector_id, text in scored],
+            "namespace": body.get("namespace", ""),
+        })
+
+    def _list(self, params):
+        self._count("pinecone_list")
+        self.latency.sleep("pinecone")
+        limit = int(params.get("limit", ["100"])[0])
+        start = int(params.get("paginationToken", ["0"])[0])
+        page = FAQ_VECTORS[start:start + limit]
+        payload = {
+            "vectors": [{"id": vector_id} for vector_id, _, _ in page],
+            "namespace": params.get("namespace", [""])[0],
+            "usage": {"readUnits": 1},
+        }
+        if start + limit < len(FAQ_VECTORS):
+            payload["pagination"] = {"next": str(start + limit)}
+        self._send_json(payload)
+
+    def _fetch(self, params):
+        self._count("pinecone_fetch")
+        self.latency.sleep("pinecone")
+        wanted = set(params.get("ids", []))
+        self._send_json({
+            "vectors": {
+                vector_id: {"id": vector_id, "values": vector, "metadata": {"text": text}}
+                for vector_id, vector, text in FAQ_VECTORS if vector_id in wanted
+            },
+            "namespace": params.get("namespace", [""])[0],
+            "usage": {"readUnits": 1},
+        })
+
+    def _chat(self, body):
+        self._count("chat_completions")
+        prompt = body["messages"][-1]["content"]
+        words = ("This is a canned answer generated for benchmarking. " * 4).split()
+        words = words[:body.get("max_tokens") or len(words)]
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(words),
+                 "total_tokens": len(prompt.split()) + len(words)}
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model")}
+
+        if not body.get("stream"):
+            self.latency.sleep("completion")
+            return self._send_json({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage,
+            })
+
+        # Time to first token is the completion latency, then one word per token delay
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.latency.sleep("completion")
+        for i, word in enumerate(words):
+            delta = {"content": (" " if i else "") + word}
+            self._write_chunk({**base, "object": "chat.completion.chunk",
+                               "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            self.latency.sleep("token")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._write_chunk({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        self._write_raw(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload):
+        self._write_raw(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+    def _write_raw(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections at shutdown is expected
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def make_server(port=0, embedding_ms=50, pinecone_ms=30, completion_ms=400, token_ms=5, jitter=0.2):
+    """
+    Creates (but does not start) the fake upstream server. Port 0 picks a free port.
+    """
+    handler = type("BenchHandler", (Handler,), {
+        "latency": Latency(embedding_ms, pinecone_ms, completion_ms, token_ms, jitter),
+        "counts": {},
+        "lock": threading.Lock(),
+    })
+    return QuietServer(("127.0.0.1", port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--embedding-latency", type=float, default=50, help="ms")
+    parser.add_argument("--pinecone-latency", type=float, default=30, help="ms")
+    parser.add_argument("--completion-latency", type=float, default=400, help="ms")
+    parser.add_argument("--token-latency", type=float, default=5, help="ms between streamed tokens")
+    parser.add_argument("--jitter", type=float, default=0.2, help="stddev as a fraction of latency")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.embedding_latency, args.pinecone_latency,
+                         args.completion_latency, args.token_latency, args.jitter)
+    print(f"Fake OpenAI:   http://127.0.0.1:{server.server_port}/v1")
+    print(f"Fake Pinecone: http://127.0.0.1:{server.server_port}")
+    server.serve_forever()
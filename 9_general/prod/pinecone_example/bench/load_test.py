@@ -0,0 +1,331 @@
+"""
+Offline load test for the pinecone_example RAG service.
+
+Starts the fake OpenAI/Pinecone upstreams and the app (Flask or ASGI) as a
+subprocess, replays a query trace at a fixed concurrency or request rate,
+and reports throughput, latency percentiles and cache hit rates.
+
+    python bench/load_test.py --concurrency 32 --requests 2000
+    python bench/load_test.py --rps 50 --trace queries.txt --max-p95-ms 800
+    python bench/load_test.py --local-index   # retrieval from the synced local replica
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_upstreams
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+# Paraphrase templates per topic; the synthetic trace draws topics with a Zipf skew
+TOPICS = [
+    ["What is your return policy?", "how do I return an item", "can I return a product I bought",
+     "what's your return policy"],
+    ["How do I track my order?", "where is my order", "track my package", "how can I track my order"],
+    ["What payment methods do you accept?", "can I pay with PayPal", "which payment methods are accepted"],
+    ["Do you ship internationally?", "do you ship abroad", "can you ship to other countries"],
+    ["How do I reset my account password?", "I forgot my password", "reset password"],
+    ["How do I contact customer support?", "support phone number", "how to reach customer support"],
+    ["What are your shipping options?", "how fast is shipping", "do you offer overnight shipping"],
+    ["Can I use multiple discount codes on a single order?", "use two coupons", "stack discount codes"],
+]
+
+
+def synthetic_trace(size, skew=1.1, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(TOPICS))]
+    trace = []
+    for _ in range(size):
+        topic = rng.choices(TOPICS, weights)[0]
+        trace.append(rng.choice(topic))
+    return trace
+
+
+def load_trace(path):
+    """
+    Reads one query per line; JSONL lines with a "query" field also work.
+    """
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line)["query"]
+            queries.append(line)
+    return queries
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(server, port, upstream_url, workdir, extra_env, local_index=False):
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": upstream_url + "/v1",
+        "PINECONE_API_KEY": "bench",
+        "PINECONE_HOST": upstream_url,
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite3"),
+        "QUERY_LOG_PATH": os.path.join(workdir, "query_log.sqlite3"),
+        "LOCAL_INDEX_ENABLED": "true" if local_index else "false",
+        "LOCAL_INDEX_DIR": os.path.join(workdir, "local_index"),
+        **extra_env,
+    }
+    if server == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"]
+    else:
+        env["FLASK_APP"] = "main"
+        cmd = [sys.executable, "-m", "flask", "run", "--port", str(port), "--no-reload"]
+    # A file, not a pipe: nothing drains stderr during the run and the access
+    # log would fill a pipe and block the app after ~1000 requests
+    log_path = os.path.join(workdir, "app.log")
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(cmd, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                raise RuntimeError("app exited during startup:\n" + f.read())
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("app did not become ready within 30s")
+
+
+def wait_for_replica(port, timeout=30):
+    """
+    Blocks until the app's local replica has synced from the fake Pinecone.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if get_json(port, "/cache/stats").get("local_index", {}).get("vectors"):
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"local replica did not sync within {timeout}s")
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", path)
+    return json.loads(conn.getresponse().read())
+
+
+class Worker(threading.local):
+    """
+    One keep-alive connection per load-generator thread.
+    """
+
+    def __init__(self, port, endpoint):
+        self.port = port
+        self.endpoint = endpoint
+        self.conn = None
+
+    def send(self, query):
+        body = json.dumps({"query": query})
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            try:
+                self.conn.request("POST", self.endpoint, body, {"Content-Type": "application/json"})
+                response = self.conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        if response.getheader("Connection", "").lower() == "close":
+            self.conn.close()
+            self.conn = None
+        if response.status != 200:
+            return f"http_{response.status}"
+        if response.getheader("Content-Type", "").startswith("text/event-stream"):
+            return sse_source(payload.decode("utf-8"))
+        data = json.loads(payload)
+        return "coalesced" if data.get("coalesced") else data.get("source", "unknown")
+
+
+def sse_source(text):
+    """
+    Answer source from the final 'done' (or 'error') event of an SSE stream.
+    """
+    event = None
+    for line in text.splitlines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: ") and event in ("done", "error"):
+            return json.loads(line[len("data: "):]).get("source", event)
+    return "incomplete"
+
+
+def run_load(trace, port, endpoint, concurrency=None, rps=None, max_in_flight=256):
+    """
+    Closed loop when `concurrency` is set, open loop at `rps` otherwise.
+    In open-loop mode latency is measured from the scheduled send time, so a
+    backed-up server is not hidden by the generator slowing down.
+    """
+    worker = Worker(port, endpoint)
+    latencies = []
+    sources = Counter()
+    lock = threading.Lock()
+
+    def one(query, scheduled):
+        try:
+            source = worker.send(query)
+        except Exception as e:
+            source = "error:" + type(e).__name__
+        elapsed = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(elapsed)
+            sources[source] += 1
+
+    start = time.perf_counter()
+    if rps:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            for i, query in enumerate(trace):
+                scheduled = start + i / rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(one, query, scheduled)
+    else:
+        queue = iter(trace)
+        queue_lock = threading.Lock()
+
+        def loop():
+            while True:
+                with queue_lock:
+                    query = next(queue, None)
+                if query is None:
+                    return
+                one(query, time.perf_counter())
+
+        threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return time.perf_counter() - start, latencies, sources
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(elapsed, latencies, sources, upstream_calls, app_stats):
+    ordered = sorted(latencies)
+    total = len(ordered)
+    errors = sum(n for s, n in sources.items() if s.startswith(("error", "http_")))
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * sum(ordered) / total, 2) if total else 0.0,
+            "p50": round(1000 * percentile(ordered, 50), 2),
+            "p95": round(1000 * percentile(ordered, 95), 2),
+            "p99": round(1000 * percentile(ordered, 99), 2),
+            "max": round(1000 * ordered[-1], 2) if total else 0.0,
+        },
+        "sources": dict(sources),
+        "hit_rate": round(sum(n for s, n in sources.items() if s in ("cache", "semantic_cache", "coalesced"))
+                          / total, 4) if total else 0.0,
+        "upstream_calls": upstream_calls,
+        "app_cache_stats": app_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the RAG service.")
+    parser.add_argument("--server", choices=["flask", "asgi"], default="flask")
+    parser.add_argument("--endpoint", default="/query/")
+    parser.add_argument("--trace", help="file with one query per line (or JSONL with a 'query' field)")
+    parser.add_argument("--requests", type=int, default=1000, help="synthetic trace size")
+    parser.add_argument("--seed", type=int, default=0)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--rps", type=float)
+    parser.add_argument("--embedding-latency", type=float, default=50, help="ms")
+    parser.add_argument("--pinecone-latency", type=float, default=30, help="ms")
+    parser.add_argument("--completion-latency", type=float, default=400, help="ms")
+    parser.add_argument("--token-latency", type=float, default=5, help="ms")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the app, e.g. SEMANTIC_CACHE_ENABLED=false")
+    parser.add_argument("--local-index", action="store_true",
+                        help="serve retrieval from the local replica synced via list/fetch (Flask only)")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="exit non-zero if p95 latency exceeds this")
+    parser.add_argument("--min-rps", type=float, help="exit non-zero if throughput is below this")
+    args = parser.parse_args()
+    if args.local_index and args.server == "asgi":
+        parser.error("--local-index needs --server flask (the ASGI app has no local replica)")
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.requests, seed=args.seed)
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    upstream = fake_upstreams.make_server(
+        0, args.embedding_latency, args.pinecone_latency,
+        args.completion_latency, args.token_latency, args.jitter)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f"http://127.0.0.1:{upstream.server_port}"
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = start_app(args.server, port, upstream_url, workdir, extra_env, local_index=args.local_index)
+        try:
+            if args.local_index:
+                wait_for_replica(port)
+            elapsed, latencies, sources = run_load(
+                trace, port, args.endpoint,
+                concurrency=None if args.rps else args.concurrency, rps=args.rps)
+            app_stats = get_json(port, "/cache/stats")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    upstream.shutdown()
+
+    report = summarize(elapsed, latencies, sources, dict(upstream.RequestHandlerClass.counts), app_stats)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = report["errors"] > 0
+    if args.max_p95_ms is not None and report["latency_ms"]["p95"] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['latency_ms']['p95']}ms > {args.max_p95_ms}ms", file=sys.stderr)
+        failed = True
+    if args.min_rps is not None and report["throughput_rps"] < args.min_rps:
+        print(f"FAIL: throughput {report['throughput_rps']} rps < {args.min_rps} rps", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+HASH_KEY = "content_hash"
+
+
+def content_hash(text, metadata=None):
+    """
+    Stable hash of a document's text and metadata.
+    """
+    payload = json.dumps({"text": text, "metadata": metadata or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sync_collection(collection, documents, metadatas=None, batch_size=100):
+    """
+    Makes a Chroma collection hold exactly `documents` (id -> text), with
+    optional `metadatas` (id -> dict).
+
+    The content hash of every document is stored in its metadata. On later
+    runs only new or changed documents are embedded and upserted, and
+    documents that are no longer in the source are deleted, so startup cost
+    follows what changed rather than the size of the knowledge base.
+    Returns counts of added, updated, deleted and unchanged documents.
+    """
+    metadatas = metadatas or {}
+    stored = collection.get(include=["metadatas"])
+    stored_hashes = {
+        doc_id: (meta or {}).get(HASH_KEY)
+        for doc_id, meta in zip(stored["ids"], stored["metadatas"])
+    }
+
+    ids, texts, metas = [], [], []
+    stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for doc_id, text in documents.items():
+        metadata = metadatas.get(doc_id) or {}
+        digest = content_hash(text, metadata)
+        if stored_hashes.get(doc_id) == digest:
+            stats["unchanged"] += 1
+            continue
+        stats["updated" if doc_id in stored_hashes else "added"] += 1
+        ids.append(doc_id)
+        texts.append(text)
+        metas.append({**metadata, HASH_KEY: digest})
+
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.upsert(ids=ids[start:end], documents=texts[start:end], metadatas=metas[start:end])
+
+    removed = [doc_id for doc_id in stored_hashes if doc_id not in documents]
+    if removed:
+        collection.delete(ids=removed)
+        stats["deleted"] = len(removed)
+    return stats
@@ -0,0 +1,273 @@
+import heapq
+import math
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+COMPARISONS = {
+    "$eq": lambda value, expected: value == expected,
+    "$ne": lambda value, expected: value != expected,
+    "$gt": lambda value, expected: value is not None and value > expected,
+    "$gte": lambda value, expected: value is not None and value >= expected,
+    "$lt": lambda value, expected: value is not None and value < expected,
+    "$lte": lambda value, expected: value is not None and value <= expected,
+    "$in": lambda value, expected: value in expected,
+    "$nin": lambda value, expected: value not in expected,
+}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def check_where(where):
+    """
+    Raises ValueError if a Chroma `where` filter uses an operator that
+    matches_where() does not support.
+    """
+    for key, condition in (where or {}).items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                check_where(clause)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        elif isinstance(condition, dict):
+            for op in condition:
+                if op not in COMPARISONS:
+                    raise ValueError(f"Unsupported where operator: {op}")
+
+
+def matches_where(metadata, where):
+    """
+    Evaluates a Chroma `where` filter against one metadata dict.
+    Supports field equality, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin, $and and $or;
+    raises ValueError for any other operator rather than silently ignoring it.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if op not in COMPARISONS:
+                    raise ValueError(f"Unsupported where operator: {op}")
+                if not COMPARISONS[op](value, expected):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over document ids. Documents can be added,
+    replaced and removed one at a time; the per-term weights used for scoring
+    are recompiled into NumPy arrays lazily, on the first search after a change.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> {doc_id: term frequency}
+        self.lengths = {}   # doc_id -> number of tokens
+        self.total_length = 0
+        self._compiled = None
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, text):
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+        self._compiled = None
+
+    def remove(self, doc_id, text=None):
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        # Without the text every posting list has to be checked
+        terms = set(tokenize(text)) if text is not None else list(self.postings)
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs and doc_id in docs:
+                del docs[doc_id]
+                if not docs:
+                    del self.postings[term]
+        self._compiled = None
+
+    def _compile(self):
+        # term -> (row numbers, idf * saturated tf), ready to be summed with bincount
+        doc_ids = list(self.lengths)
+        rows = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+        n = len(doc_ids)
+        avg_length = self.total_length / n or 1.0
+        terms = {}
+        for term, docs in self.postings.items():
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            lengths = np.fromiter((self.lengths[d] for d in docs), dtype=np.float32, count=len(docs))
+            norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+            terms[term] = (
+                np.fromiter((rows[d] for d in docs), dtype=np.int64, count=len(docs)),
+                (idf * tf * (self.k1 + 1) / (tf + norm)).astype(np.float32),
+            )
+        self._compiled = (doc_ids, terms)
+
+    def search(self, query, k=10, accept=None):
+        """
+        Returns up to k (doc_id, score) pairs, best first. `accept` is an
+        optional predicate on doc ids used for filtering.
+        """
+        if not self.lengths:
+            return []
+        if self._compiled is None:
+            self._compile()
+        doc_ids, terms = self._compiled
+        hits = [terms[term] for term in set(tokenize(query)) if term in terms]
+        if not hits:
+            return []
+        rows = np.concatenate([h[0] for h in hits])
+        weights = np.concatenate([h[1] for h in hits])
+        scores = np.bincount(rows, weights=weights, minlength=len(doc_ids))
+
+        matched = np.flatnonzero(scores)
+        if accept is not None:
+            matched = np.array([row for row in matched if accept(doc_ids[row])], dtype=np.int64)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(doc_ids[row], float(scores[row])) for row in matched]
+
+
+class HybridRetriever:
+    """
+    Keyword (BM25) + vector retrieval over a Chroma collection, fused with
+    Reciprocal Rank Fusion.
+
+    A BM25 inverted index of the collection's documents lives in process next
+    to the collection. sync() mirrors it incrementally (only added, changed or
+    removed documents touch the index), and keyword search plus fusion take
+    microseconds for FAQ-sized corpora, so a query costs about the same as the
+    Chroma query it wraps. query() takes the same query_texts / n_results /
+    where arguments as collection.query and returns results in the same shape,
+    with an RRF "scores" list alongside "distances" (None for documents that
+    only matched on keywords).
+
+    Pass `embed_query` (text -> vector) when the collection has no embedding
+    function of its own, e.g. a LangChain Chroma store's `_collection`.
+
+    The local copy only changes on sync(), which re-reads the whole
+    collection, so query() never checks the collection on its own. It syncs
+    when a dense result has an id it has not seen (a document added
+    elsewhere) and when `sync_interval` seconds have passed since the last
+    sync. That timer is what picks up deletions and in-place edits made by
+    other processes; pass sync_interval=None to disable it and call sync()
+    after writing to the collection instead.
+    """
+
+    def __init__(self, collection, embed_query=None, rrf_k=60, fetch_k=20, k1=1.5, b=0.75,
+                 sync_interval=60):
+        self.collection = collection
+        self.embed_query = embed_query
+        self.rrf_k = rrf_k
+        self.fetch_k = fetch_k
+        self.sync_interval = sync_interval
+        self.bm25 = BM25Index(k1=k1, b=b)
+        self.documents = {}  # id -> (document, metadata)
+        self.synced_at = 0.0
+        self.sync()
+
+    def sync(self):
+        """
+        Brings the keyword index in line with the collection and returns
+        counts of added, updated and deleted documents.
+        """
+        stored = self.collection.get(include=["documents", "metadatas"])
+        current = {
+            doc_id: (document or "", metadata or {})
+            for doc_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        stats = {"added": 0, "updated": 0, "deleted": 0}
+        for doc_id, entry in current.items():
+            previous = self.documents.get(doc_id)
+            if previous == entry:
+                continue
+            stats["updated" if previous is not None else "added"] += 1
+            if previous is not None:
+                self.bm25.remove(doc_id, previous[0])
+            self.bm25.add(doc_id, entry[0])
+            self.documents[doc_id] = entry
+        for doc_id in [doc_id for doc_id in self.documents if doc_id not in current]:
+            self.bm25.remove(doc_id, self.documents.pop(doc_id)[0])
+            stats["deleted"] += 1
+        self.synced_at = time.monotonic()
+        return stats
+
+    def _is_stale(self):
+        return self.sync_interval is not None and time.monotonic() - self.synced_at >= self.sync_interval
+
+    def query(self, query_texts, n_results=3, where=None):
+        check_where(where)
+        if self._is_stale():
+            self.sync()
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": [], "scores": []}
+        fetch_k = min(max(self.fetch_k, n_results), len(self.documents))
+        if not fetch_k:
+            for key in results:
+                results[key] = [[] for _ in query_texts]
+            return results
+
+        # Dense side: one Chroma query for every text
+        dense_params = {"n_results": fetch_k, "include": ["distances"]}
+        if where:
+            dense_params["where"] = where
+        if self.embed_query is not None:
+            dense_params["query_embeddings"] = [self.embed_query(text) for text in query_texts]
+        else:
+            dense_params["query_texts"] = list(query_texts)
+        dense = self.collection.query(**dense_params)
+
+        def accept(doc_id):
+            return matches_where(self.documents[doc_id][1], where)
+
+        for row, text in enumerate(query_texts):
+            dense_ids = dense["ids"][row]
+            distances = dict(zip(dense_ids, dense["distances"][row]))
+            keyword_ids = [doc_id for doc_id, _ in self.bm25.search(text, fetch_k, accept if where else None)]
+
+            fused = {}
+            for ranking in (dense_ids, keyword_ids):
+                for rank, doc_id in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            top = heapq.nlargest(n_results, fused.items(), key=lambda item: item[1])
+
+            # Documents added since the last sync() are not in the local copy yet
+            missing = [doc_id for doc_id, _ in top if doc_id not in self.documents]
+            if missing:
+                self.sync()
+                top = [(doc_id, score) for doc_id, score in top if doc_id in self.documents]
+
+            results["ids"].append([doc_id for doc_id, _ in top])
+            results["documents"].append([self.documents[doc_id][0] for doc_id, _ in top])
+            results["metadatas"].append([self.documents[doc_id][1] for doc_id, _ in top])
+            results["distances"].append([distances.get(doc_id) for doc_id, _ in top])
+            results["scores"].append([score for _, score in top])
+        return results
@@ -2,6 +2,7 @@
 # Add our knowledge base to the collection
 # Query the collection using semantic search
 import chromadb
+from chroma_sync import sync_collection
 
 client = chromadb.PersistentClient(path=r"c:/code/agenticai/9_general/rag/chromadb")
 
@@ -15,10 +16,8 @@ knowledge_base = {
     "customer_support": "You can reach our support team 24/7 via email or chat."
 }
 
-collection.add(
-    documents=list(knowledge_base.values()),
-    ids=list(knowledge_base.keys())
-)
+# Only new or changed documents are embedded; removed ones are deleted
+sync_collection(collection, knowledge_base)
 
 # Query is always on the values (documents), not keys
 results = collection.query(
@@ -1,13 +1,15 @@
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
+from chroma_sync import sync_collection
 
 # Initialize Chroma with persistence
 client = chromadb.PersistentClient(path=r"c:/code/agenticai/9_general/rag/chromadb")
 
-# Hugging Face embedding function
+# Hugging Face embedding function (vectors cached on disk, only new texts are encoded)
 # These are higher quality embeddings
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="sentence-transformers/all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/9_general/rag/embedding_cache.sqlite3"
 )
 
 # Create / load collection with embedding function
@@ -25,11 +27,8 @@ knowledge_base = {
     "customer_support": "You can reach our support team 24/7 via email or chat."
 }
 
-# Add data
-collection.add(
-    documents=list(knowledge_base.values()),
-    ids=list(knowledge_base.keys())
-)
+# Add data (only new or changed documents are embedded)
+sync_collection(collection, knowledge_base)
 
 # Query ChromaDB using HF embeddings
 results = collection.query(
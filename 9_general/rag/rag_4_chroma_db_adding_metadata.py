@@ -1,12 +1,15 @@
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
+from chroma_sync import sync_collection
+from hybrid_retriever import HybridRetriever
 
 # Initialize Chroma with persistence
 client = chromadb.PersistentClient(path=r"c:/code/agenticai/9_general/rag/chromadb")
 
-# Hugging Face embedding function
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
+# Hugging Face embedding function (vectors cached on disk, only new texts are encoded)
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="sentence-transformers/all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/9_general/rag/embedding_cache.sqlite3"
 )
 
 # Create / load collection with embedding function
@@ -39,11 +42,11 @@ knowledge_base = {
     }
 }
 
-# Add data with metadata
-collection.add(
-    documents=[item["text"] for item in knowledge_base.values()],
-    ids=list(knowledge_base.keys()),
-    metadatas=[item["metadata"] for item in knowledge_base.values()]
+# Add data with metadata (only new or changed documents are embedded)
+sync_collection(
+    collection,
+    {key: item["text"] for key, item in knowledge_base.items()},
+    metadatas={key: item["metadata"] for key, item in knowledge_base.items()}
 )
 
 # Query ChromaDB using HF embeddings
@@ -53,3 +56,13 @@ results = collection.query(
 )
 
 print(results)
+
+# Hybrid search: BM25 keyword matches fused with the vector results (RRF),
+# so short keyword queries like "PayPal" find the exact document
+retriever = HybridRetriever(collection)
+results = retriever.query(
+    query_texts=["PayPal"],
+    n_results=2
+)
+
+print(results)
@@ -1,9 +1,13 @@
 import chromadb
-from chromadb.utils import embedding_functions
+from cached_embeddings import CachedSentenceTransformerEmbeddingFunction
+from hybrid_retriever import HybridRetriever
 from langchain_community.llms import Ollama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
+import time
 
 # --------------------------------
 # CONFIGURE OLLAMA ENDPOINT
@@ -15,9 +19,10 @@ os.environ["OLLAMA_HOST"] = "http://localhost:11434"
 # --------------------------------
 client = chromadb.PersistentClient(path=r"c:/code/agenticai/9_general/rag/chromadb")
 
-# Hugging Face embedding function
-embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
+# Hugging Face embedding function (vectors cached on disk, only new texts are encoded)
+embedding_fn = CachedSentenceTransformerEmbeddingFunction(
+    model_name="sentence-transformers/all-MiniLM-L6-v2",
+    path=r"c:/code/agenticai/9_general/rag/embedding_cache.sqlite3"
 )
 
 # Create / load collection with embedding function
@@ -61,6 +66,9 @@ if collection.count() == 0:
 else:
     print(f"ChromaDB already contains {collection.count()} documents")
 
+# Keyword (BM25) index kept next to the collection; queries fuse both rankings
+retriever = HybridRetriever(collection)
+
 # --------------------------------
 # INITIALIZE LANGCHAIN WITH OLLAMA
 # --------------------------------
@@ -91,6 +99,18 @@ prompt = ChatPromptTemplate(
 # --------------------------------
 # RAG QUERY FUNCTION
 # --------------------------------
+def generate_answer(user_question, retrieved_docs):
+    """
+    Ask the LLM to answer the question from the retrieved documents
+    """
+    # Combine retrieved documents as context
+    context = "\n\n".join(retrieved_docs)
+    messages = [
+        SystemMessage(content=context),
+        HumanMessage(content=user_question)
+    ]
+    return model.invoke(messages)
+
 def query_with_rag(user_question, category_filter=None, n_results=3):
     """
     Query ChromaDB and use LangChain LLM to generate answer
@@ -114,36 +134,28 @@ def query_with_rag(user_question, category_filter=None, n_results=3):
         query_params["where"] = category_filter
         print(f"Filter: {category_filter}")
     
-    results = collection.query(**query_params)
+    results = retriever.query(**query_params)
     
     # Display retrieved documents
     print(f"\nRetrieved {len(results['documents'][0])} relevant documents:")
     print("-" * 70)
     
     retrieved_docs = []
-    for i, (doc, metadata, distance) in enumerate(zip(
+    for i, (doc, metadata, score) in enumerate(zip(
         results['documents'][0],
         results['metadatas'][0],
-        results['distances'][0]
+        results['scores'][0]
     ), 1):
-        print(f"\n{i}. [{metadata['category'].upper()}] (similarity: {1-distance:.3f})")
+        print(f"\n{i}. [{metadata['category'].upper()}] (hybrid score: {score:.4f})")
         print(f"   {doc}")
         retrieved_docs.append(doc)
     
-    # Combine retrieved documents as context
-    context = "\n\n".join(retrieved_docs)
-    
     # Generate answer using LangChain
     print(f"\n{'='*70}")
     print("Generating Answer with LLM...")
     print(f"{'='*70}")
     
-    messages = [
-        SystemMessage(content=context),
-        HumanMessage(content=user_question)
-    ]
-    
-    response = model.invoke(messages)
+    response = generate_answer(user_question, retrieved_docs)
     
     print(f"\nAnswer:\n{response}")
     print(f"\n{'='*70}\n")
@@ -155,6 +167,78 @@ def query_with_rag(user_question, category_filter=None, n_results=3):
         "metadata": results['metadatas'][0]
     }
 
+# --------------------------------
+# BATCH RAG QUERY FUNCTION
+# --------------------------------
+def query_with_rag_batch(questions, category_filters=None, n_results=3, max_workers=4):
+    """
+    Answer many questions at once
+    
+    Retrieval for all questions is one hybrid query, i.e. one collection.query
+    call (one call per distinct filter when filters differ, since a Chroma
+    query takes a single where clause). Answers are generated concurrently, at most max_workers
+    requests to Ollama at a time (match OLLAMA_NUM_PARALLEL on the server).
+    
+    Args:
+        questions: List of user questions
+        category_filters: Optional list of metadata filters, one per question (None for no filter)
+        n_results: Number of documents to retrieve per question
+        max_workers: Maximum number of concurrent LLM requests
+    
+    Returns:
+        One result per question, in the same order, with per-stage timings in seconds
+    """
+    category_filters = category_filters or [None] * len(questions)
+    if len(category_filters) != len(questions):
+        raise ValueError("category_filters must have one entry per question")
+    start = time.perf_counter()
+    
+    # Group questions that share a filter so each group is a single query
+    groups = {}
+    for i, category_filter in enumerate(category_filters):
+        key = json.dumps(category_filter, sort_keys=True)
+        groups.setdefault(key, []).append(i)
+    
+    retrieved = [None] * len(questions)
+    for key, indices in groups.items():
+        query_params = {
+            "query_texts": [questions[i] for i in indices],
+            "n_results": n_results
+        }
+        category_filter = json.loads(key)
+        if category_filter:
+            query_params["where"] = category_filter
+        results = retriever.query(**query_params)
+        for row, i in enumerate(indices):
+            retrieved[i] = (results['documents'][row], results['metadatas'][row])
+    retrieval_seconds = time.perf_counter() - start
+    
+    def answer(i):
+        generation_start = time.perf_counter()
+        response = generate_answer(questions[i], retrieved[i][0])
+        return response, time.perf_counter() - generation_start
+    
+    # map() keeps results in question order
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        answers = list(pool.map(answer, range(len(questions))))
+    total_seconds = time.perf_counter() - start
+    
+    return [
+        {
+            "question": question,
+            "retrieved_docs": docs,
+            "answer": response,
+            "metadata": metadatas,
+            "timings": {
+                "retrieval": retrieval_seconds,
+                "generation": generation_seconds,
+                "total": total_seconds
+            }
+        }
+        for question, (docs, metadatas), (response, generation_seconds)
+        in zip(questions, retrieved, answers)
+    ]
+
 # --------------------------------
 # EXAMPLE QUERIES
 # --------------------------------
@@ -181,6 +265,21 @@ if __name__ == "__main__":
         n_results=5
     )
     
+    # Batch: retrieve for all questions together, answer concurrently
+    batch = query_with_rag_batch(
+        [
+            "How long does shipping take?",
+            "What payment options do you have?",
+            "Can I return a product if I don't like it?"
+        ],
+        category_filters=[None, {"category": "payment"}, None]
+    )
+    for result in batch:
+        timings = result["timings"]
+        print(f"Q: {result['question']}")
+        print(f"A: {result['answer']}")
+        print(f"   retrieval {timings['retrieval']:.3f}s, generation {timings['generation']:.3f}s, total {timings['total']:.3f}s\n")
+    
     # --------------------------------
     # INTERACTIVE MODE (Optional)
     # --------------------------------
@@ -6,9 +6,12 @@
 # -------------------------------
 # 2. Imports
 # -------------------------------
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
+from llama_index.core import (
+    VectorStoreIndex, SimpleDirectoryReader, Settings, StorageContext, load_index_from_storage
+)
 from llama_index.llms.openai import OpenAI
 from dotenv import load_dotenv
+import os
 load_dotenv(override=True)
 
 # -------------------------------
@@ -27,10 +30,13 @@ Settings.llm = OpenAI(
 # Read the text file and wrap it in a Document object
 # No chunking yet — that happens during indexing
 # Even though it’s a single file, LlamaIndex treats it as a collection of documents
+# filename_as_id gives each document a stable id, so a later run can tell
+# which files are new or changed
 documents = SimpleDirectoryReader(
     input_files=[
         r"C:\code\agenticai\3_langgraph\darwin\Origin-of-Species.txt"
-    ]
+    ],
+    filename_as_id=True
 ).load_data()
 
 # -------------------------------
@@ -43,7 +49,26 @@ documents = SimpleDirectoryReader(
 # Step 2: Embedding: Each chunk -> Vector embedding
 # e.g. Text chunk → [0.023, -0.91, 0.44, ...]
 # Step 3: Store all embeddings as in-memory vector database
-index = VectorStoreIndex.from_documents(documents)
+# The index (docstore + vectors) is persisted to disk, so this only happens once
+PERSIST_DIR = r"C:\code\agenticai\9_general\rag\darwin_index"
+
+if os.path.exists(PERSIST_DIR):
+    # Later runs: load the saved index in seconds instead of re-embedding the book
+    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
+    index = load_index_from_storage(storage_context)
+    # Only documents whose content hash changed (or new ones) are re-chunked and re-embedded
+    refreshed = index.refresh_ref_docs(documents)
+    # Drop files that are no longer part of the corpus
+    removed = set(index.ref_doc_info) - {doc.doc_id for doc in documents}
+    for doc_id in removed:
+        index.delete_ref_doc(doc_id, delete_from_docstore=True)
+    if any(refreshed) or removed:
+        index.storage_context.persist(persist_dir=PERSIST_DIR)
+    print(f"Loaded index from {PERSIST_DIR} ({sum(refreshed)} documents re-indexed)")
+else:
+    index = VectorStoreIndex.from_documents(documents)
+    index.storage_context.persist(persist_dir=PERSIST_DIR)
+    print(f"Built index and saved it to {PERSIST_DIR}")
 
 # Create a query engine
 # Builds a retrieval + reasoning (synthesis) chain
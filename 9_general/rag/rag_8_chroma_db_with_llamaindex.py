@@ -4,9 +4,13 @@
 # ChromaVectorStore = Storage backend
 # chromadb = Actual database engine
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
+from llama_index.core.ingestion import IngestionPipeline, DocstoreStrategy
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.llms.openai import OpenAI
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import chromadb
+import os
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -43,20 +47,40 @@ vector_store = ChromaVectorStore(
 documents = SimpleDirectoryReader(
     input_files=[
         r"C:\code\agenticai\3_langgraph\darwin\Origin-of-Species.txt"
-    ]
+    ],
+    filename_as_id=True  # stable ids let the pipeline recognise unchanged files
 ).load_data()
 
 # -------------------------------
-# Build index USING ChromaDB
+# Ingest into ChromaDB (only what changed)
 # -------------------------------
 # Chunking (~512 token chunks, Add overlap)
 # Embeddings: Each chunk -> Vector embedding
 # Insertion: Vectors stored in ChromaDB, Metadata preserved
 # Persistence: Chroma saves it to the disk
-index = VectorStoreIndex.from_documents(
-    documents,
-    vector_store=vector_store
+# The docstore remembers a hash per document, so unchanged files are skipped
+# and changed ones replace their old chunks instead of adding duplicates.
+# The ingestion cache keeps chunk/embedding results for inputs it has seen.
+PIPELINE_DIR = r"C:\code\agenticai\9_general\rag\darwin_pipeline"
+
+pipeline = IngestionPipeline(
+    transformations=[SentenceSplitter(), Settings.embed_model],
+    vector_store=vector_store,
+    docstore=SimpleDocumentStore(),
+    docstore_strategy=DocstoreStrategy.UPSERTS_AND_DELETE,
 )
+if os.path.exists(PIPELINE_DIR):
+    pipeline.load(PIPELINE_DIR)
+elif collection.count():
+    # Collection filled by earlier runs without a docstore (possibly with duplicates)
+    collection.delete(ids=collection.get()["ids"])
+
+nodes = pipeline.run(documents=documents)
+pipeline.persist(PIPELINE_DIR)
+print(f"Ingested {len(nodes)} new or changed chunks")
+
+# The index reads straight from the Chroma collection
+index = VectorStoreIndex.from_vector_store(vector_store)
 
 # -------------------------------
 # Query